@@ -74,6 +74,81 @@ const App = {
         }
     },
 
+    /**
+     * Search the catalogue via the precomputed index in search/ (built by the
+     * desktop app). Only the token shards for the typed prefixes and the doc
+     * shards holding the matches are downloaded. Every term must match the
+     * start of a word in the name/variant; hyphenated terms also match the
+     * start of the SKU or a compound ("pt-2026", "blue-t"). Sharded and
+     * single-shard indexes give the same results.
+     * Not wired into the pages yet - call it from a search box.
+     * Returns [{id, name, variant, category, price, image}]
+     */
+    async searchCatalog(query, category = null) {
+        const terms = query.toLowerCase().match(/[a-z0-9]+(?:-[a-z0-9]+)*/g) || [];
+        if (terms.length === 0) return [];
+
+        const manifest = await this.loadSearchFile('manifest.json');
+        if (!manifest) return [];
+
+        let matches = null;
+        for (const term of terms) {
+            // Hyphenated terms (SKUs, "blue-tongue") are sharded by a longer prefix
+            const compound = term.includes('-');
+            const prefix = term.slice(0, compound ? manifest.compound_shard_length : manifest.shard_length);
+            const keys = manifest.sharded
+                ? manifest.token_shards.filter(key => key.includes('-') === compound && key.startsWith(prefix))
+                : manifest.token_shards;
+
+            const termMatches = new Set();
+            for (const key of keys) {
+                const shard = await this.loadSearchFile(`tokens_${key}.json`) || {};
+                for (const [token, ids] of Object.entries(shard)) {
+                    // A plain term matches words only - compounds' words are indexed too
+                    if (token.includes('-') !== compound) continue;
+                    if (token.startsWith(term)) ids.forEach(id => termMatches.add(id));
+                }
+            }
+            matches = matches === null ? termMatches : new Set([...matches].filter(id => termMatches.has(id)));
+            if (matches.size === 0) return [];
+        }
+
+        const results = [];
+        for (const id of matches) {
+            const docs = await this.loadSearchFile(`docs_${this.docShardOf(id, manifest.doc_shards)}.json`) || {};
+            if (!docs[id]) continue;
+            const [name, variant, itemCategory, price, image] = docs[id];
+            if (category && itemCategory !== category) continue;
+            results.push({ id, name, variant, category: itemCategory, price, image });
+        }
+        return results;
+    },
+
+    /**
+     * Doc shard holding an item - must match doc_shard_of() in search_index.py
+     */
+    docShardOf(id, count) {
+        let h = 0;
+        for (const ch of id) h = (Math.imul(h, 31) + ch.codePointAt(0)) >>> 0;
+        return h % count;
+    },
+
+    /**
+     * Fetch (once) a file of the search index, or null if it is missing
+     */
+    async loadSearchFile(name) {
+        this.searchFiles = this.searchFiles || {};
+        if (!(name in this.searchFiles)) {
+            this.searchFiles[name] = fetch(`search/${name}`)
+                .then(response => response.ok ? response.json() : null)
+                .catch(error => {
+                    console.error("🔎 Search Index Load Error:", error);
+                    return null;
+                });
+        }
+        return this.searchFiles[name];
+    },
+
     createCardHTML(item) {
         const isAnimal = item.category === 'animals';
         const badge = (isAnimal && item.verified_feeder) ? '<div class="badge-verified">Verified Feeder</div>' : '';
@@ -0,0 +1,311 @@
+"""
+Git Plumbing Publisher - Alternative to the GitHub Contents API
+
+Publishes straight into a local clone of the site repository using git
+plumbing (hash-object / update-index / write-tree / commit-tree), so raw
+bytes go out in git's delta-compressed pack format instead of base64 JSON,
+and several files can share one commit. The clone's working tree and
+checked-out branch are never touched.
+
+Config (config.json):
+    "publish_backend": "git",
+    "git_clone_path": "/path/to/ColdBloodedHeartbeats",
+    "git_remote": "origin",          (optional)
+    "github_branch": "main"          (optional)
+
+Usage:
+    python git_publisher.py bench [--items 500] [--publishes 20]
+"""
+import argparse
+import base64
+import json
+import os
+import re
+import shutil
+import socket
+import subprocess
+import tempfile
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class GitError(Exception):
+    """A git command failed."""
+
+
+class GitPublisher:
+    """Publishes files by committing to a local clone and pushing."""
+    
+    def __init__(self, config_path: Optional[str] = None, config: Optional[dict] = None):
+        if config is None:
+            if config_path is None:
+                config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.json")
+            config = self._load_config(config_path)
+        self.config = config
+    
+    def _load_config(self, config_path: str) -> dict:
+        """Load publishing configuration."""
+        if os.path.exists(config_path):
+            with open(config_path, "r") as f:
+                return json.load(f)
+        return {}
+    
+    @property
+    def repo_path(self) -> str:
+        """Local clone of the site repository."""
+        return self.config.get("git_clone_path", "")
+    
+    @property
+    def remote(self) -> str:
+        """Remote to push to."""
+        return self.config.get("git_remote", "origin")
+    
+    @property
+    def branch(self) -> str:
+        """Branch that GitHub Pages serves."""
+        return self.config.get("github_branch", "main")
+    
+    def publish_file(self, file_path: str, content: str, message: str = "Update inventory") -> Tuple[bool, str]:
+        """
+        Publish a file to the site repository.
+        
+        Args:
+            file_path: Path in the repo (e.g., "docs/inventory.json")
+            content: File content as string
+            message: Commit message
+        
+        Returns:
+            Tuple of (success, message)
+        """
+        return self.publish_files({file_path: content.encode("utf-8")}, message)
+    
+    def publish_image(self, local_path: str, repo_path: str) -> Tuple[bool, str]:
+        """
+        Publish an image file to the site repository.
+        
+        Args:
+            local_path: Local file path
+            repo_path: Path in the repo (e.g., "docs/Assets/image.jpg")
+        
+        Returns:
+            Tuple of (success, message)
+        """
+        if not os.path.exists(local_path):
+            return False, f"File not found: {local_path}"
+        
+        with open(local_path, "rb") as f:
+            content_bytes = f.read()
+        return self.publish_files({repo_path: content_bytes}, f"Add image: {os.path.basename(repo_path)}")
+    
+    def publish_files(self, files: Dict[str, bytes], message: str) -> Tuple[bool, str]:
+        """
+        Publish several files in a single commit.
+        
+        Only blobs that differ from the remote branch are staged; if nothing
+        changed, no commit is made.
+        
+        Args:
+            files: Repo path -> file content
+            message: Commit message
+        
+        Returns:
+            Tuple of (success, message)
+        """
+        if not self.is_configured():
+            return False, "Git publishing not configured. Set git_clone_path in config.json"
+        
+        try:
+            # A failed fetch (offline, or branch not created yet) leaves the old
+            # tracking ref; a stale parent is then rejected by the push.
+            self._git("fetch", "--quiet", self.remote, self.branch, check=False)
+            tracking_ref = f"refs/remotes/{self.remote}/{self.branch}"
+            parent = self._git("rev-parse", "--verify", "--quiet", tracking_ref, check=False) or None
+            
+            # Hash new content and keep only what actually changed
+            changed: Dict[str, str] = {}
+            for path, content in files.items():
+                blob = self._git("hash-object", "-w", "--stdin", input=content)
+                if parent is None or self._blob_at(parent, path) != blob:
+                    changed[path] = blob
+            
+            if not changed:
+                return True, "No changes to publish"
+            
+            commit = self._commit(parent, changed, message)
+            self._git("push", "--quiet", self.remote, f"{commit}:refs/heads/{self.branch}")
+            self._git("update-ref", tracking_ref, commit)
+            return True, "Published successfully!"
+        except GitError as e:
+            return False, f"Git error: {e}"
+        except OSError as e:
+            return False, f"Git not available: {e}"
+    
+    def is_configured(self) -> bool:
+        """Check if a local clone is configured."""
+        return bool(self.repo_path) and os.path.isdir(self.repo_path)
+    
+    def is_reachable(self, timeout: float = 2.0) -> bool:
+        """Connectivity check: can we open a socket to the remote's host? (Local remotes always can.)"""
+        try:
+            url = self._git("remote", "get-url", self.remote)
+        except (GitError, OSError):
+            return False
+        
+        host, port = remote_host(url)
+        if host is None:
+            return True
+        try:
+            with socket.create_connection((host, port), timeout=timeout):
+                return True
+        except OSError:
+            return False
+    
+    def _commit(self, parent: Optional[str], changed: Dict[str, str], message: str) -> str:
+        """Build a commit from parent's tree plus the changed blobs, using a scratch index."""
+        fd, index_path = tempfile.mkstemp(prefix="publish-index-")
+        os.close(fd)
+        os.remove(index_path)  # git wants to create the index itself
+        env = {"GIT_INDEX_FILE": index_path}
+        try:
+            if parent:
+                self._git("read-tree", parent, env=env)
+            entries = "".join(f"100644 {blob}\t{path}\n" for path, blob in changed.items())
+            self._git("update-index", "--add", "--index-info", input=entries.encode("utf-8"), env=env)
+            tree = self._git("write-tree", env=env)
+        finally:
+            if os.path.exists(index_path):
+                os.remove(index_path)
+        
+        args = ["commit-tree", tree, "-m", message]
+        if parent:
+            args[2:2] = ["-p", parent]
+        return self._git(*args)
+    
+    def _blob_at(self, commit: str, path: str) -> Optional[str]:
+        """Get the blob ID of a path in a commit (None if absent)."""
+        return self._git("rev-parse", "--verify", "--quiet", f"{commit}:{path}", check=False) or None
+    
+    def _git(self, *args: str, input: Optional[bytes] = None, env: Optional[dict] = None, check: bool = True) -> str:
+        """Run a git command in the clone and return its stripped stdout."""
+        full_env = None
+        if env:
+            full_env = dict(os.environ)
+            full_env.update(env)
+        result = subprocess.run(
+            ["git", *args],
+            cwd=self.repo_path,
+            input=input,
+            env=full_env,
+            capture_output=True
+        )
+        if check and result.returncode != 0:
+            raise GitError(result.stderr.decode("utf-8", "replace").strip() or f"git {args[0]} failed")
+        return result.stdout.decode("utf-8", "replace").strip()
+
+
+def remote_host(url: str) -> Tuple[Optional[str], int]:
+    """
+    Get (host, port) from a git remote URL, or (None, 0) for a local path.
+    
+    Handles https://host/..., ssh://[user@]host[:port]/... and scp-style
+    user@host:path remotes.
+    """
+    if "://" in url:
+        parsed = urlparse(url)
+        if parsed.scheme == "file" or not parsed.hostname:
+            return None, 0
+        default_port = {"http": 80, "https": 443, "git": 9418}.get(parsed.scheme, 22)
+        return parsed.hostname, parsed.port or default_port
+    
+    match = re.match(r"^(?:[^@/]+@)?([^:/]{2,}):", url)  # 2+ chars: "C:/repo" is a local path
+    if match and not os.path.exists(url):
+        return match.group(1), 22
+    return None, 0
+
+
+def rest_payload_bytes(content: bytes, file_path: str, message: str) -> int:
+    """Size of the JSON body GitHubPublisher PUTs for one file (headers excluded)."""
+    body = {
+        "message": message,
+        "content": base64.b64encode(content).decode("utf-8"),
+        "branch": "main",
+        "sha": "0" * 40,
+    }
+    return len(json.dumps(body).encode("utf-8"))
+
+
+def run_benchmark(items: int = 500, publishes: int = 20) -> dict:
+    """
+    Compare bytes sent per publish: git push to a local bare repo vs the REST
+    contents API payload. REST bytes are computed, not sent, since the
+    benchmark runs offline; its wall time is therefore not measured.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix="cbh-git-bench-")
+    try:
+        bare = os.path.join(tmp_dir, "site.git")
+        clone = os.path.join(tmp_dir, "clone")
+        subprocess.run(["git", "init", "--quiet", "--bare", "-b", "main", bare], check=True)
+        subprocess.run(["git", "clone", "--quiet", bare, clone], check=True, capture_output=True)
+        
+        publisher = GitPublisher(config={"git_clone_path": clone, "github_branch": "main"})
+        for key, value in [("user.name", "bench"), ("user.email", "bench@example.com")]:
+            publisher._git("config", key, value)
+        
+        inventory = [
+            {"id": f"PT-2026-01-01-{i:04X}", "category": "pantry", "name": f"Feeder {i}",
+             "variant": "Medium", "price": 12.5, "quantity": 10, "image": "", "status": "available"}
+            for i in range(items)
+        ]
+        path = "docs/inventory.json"
+        publisher.publish_file(path, json.dumps(inventory, indent=2))
+        
+        git_bytes: List[int] = []
+        rest_bytes: List[int] = []
+        git_seconds: List[float] = []
+        for n in range(publishes):
+            inventory[n % items]["quantity"] -= 1
+            content = json.dumps(inventory, indent=2)
+            before = publisher._git("rev-parse", "refs/remotes/origin/main")
+            
+            started = time.perf_counter()
+            success, message = publisher.publish_file(path, content)
+            git_seconds.append(time.perf_counter() - started)
+            if not success:
+                raise GitError(message)
+            
+            after = publisher._git("rev-parse", "refs/remotes/origin/main")
+            pack = subprocess.run(
+                ["git", "pack-objects", "--stdout", "--revs", "--thin"],
+                cwd=clone, input=f"{after}\n^{before}\n".encode(), capture_output=True, check=True
+            ).stdout
+            git_bytes.append(len(pack))
+            rest_bytes.append(rest_payload_bytes(content.encode("utf-8"), path, "Update inventory"))
+        
+        return {
+            "items": items,
+            "publishes": publishes,
+            "file_bytes": len(content.encode("utf-8")),
+            "git_pack_bytes_avg": sum(git_bytes) // publishes,
+            "rest_body_bytes_avg": sum(rest_bytes) // publishes,
+            "git_seconds_avg": round(sum(git_seconds) / publishes, 3),
+            "rest_requests_per_publish": 2,  # GET sha + PUT
+        }
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Git plumbing publisher")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    bench = sub.add_parser("bench", help="Compare git push against the REST payload size")
+    bench.add_argument("--items", type=int, default=500)
+    bench.add_argument("--publishes", type=int, default=20)
+    
+    args = parser.parse_args()
+    print(json.dumps(run_benchmark(args.items, args.publishes), indent=2))
+
+
+if __name__ == "__main__":
+    main()
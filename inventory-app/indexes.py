@@ -0,0 +1,170 @@
+"""
+Sorted Secondary Indexes for Inventory Queries
+
+Keeps one sorted key list per field (price, quantity, status, created
+date), scoped by category, updated incrementally from Storage change
+events. A query bisects to the matching range of one index and walks
+only that slice. Price filters with "in stock" walk a (stocked, price)
+index so sold-out items are never visited: "animals under $500, in stock,
+cheapest first" costs O(log n + output) rather than a filter-and-sort of
+the whole catalogue. Other combinations walk the narrowest index they can
+bisect and filter (and, if it isn't the sort field, sort) that slice.
+"""
+import bisect
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from models import InventoryItem
+from storage import Storage
+
+
+# Field name -> key function
+INDEXED_FIELDS: Dict[str, Callable[[InventoryItem], Any]] = {
+    "price": lambda item: item.price,
+    # In-stock items after sold-out ones, each by price
+    "stock_price": lambda item: (item.quantity > 0, item.price),
+    "quantity": lambda item: item.quantity,
+    "status": lambda item: item.status,
+    "created": lambda item: item.created_on(),
+}
+
+# Sort options for the list view: label -> (field, descending)
+SORT_OPTIONS: Dict[str, Optional[Tuple[str, bool]]] = {
+    "Default": None,
+    "Price: Low to High": ("price", False),
+    "Price: High to Low": ("price", True),
+    "Stock: Low to High": ("quantity", False),
+    "Stock: High to Low": ("quantity", True),
+    "Status": ("status", False),
+    "Newest First": ("created", True),
+    "Oldest First": ("created", False),
+}
+
+# Sorts after every real item ID, so (category, value, MAX_ID) ends a range
+MAX_ID = "\uffff"
+
+IndexKey = Tuple[str, Any, str]  # (category, value, item id)
+
+
+class InventoryIndex:
+    """Sorted per-field indexes over a Storage, kept in sync via its listener hook."""
+    
+    def __init__(self, storage: Storage):
+        self.storage = storage
+        self._items: Dict[str, InventoryItem] = {}
+        self._indexes: Dict[str, List[IndexKey]] = {field: [] for field in INDEXED_FIELDS}
+        storage.add_listener(self._on_change)
+    
+    def query(
+        self,
+        category: str,
+        sort: Optional[str] = None,
+        descending: bool = False,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = False
+    ) -> List[InventoryItem]:
+        """
+        Get items in a category, filtered by price/stock and sorted by a field.
+        
+        Args:
+            category: Category ID
+            sort: Indexed field to order by (None keeps storage order, like the unfiltered list)
+            descending: Reverse the sort order
+            min_price: Inclusive lower price bound
+            max_price: Inclusive upper price bound
+            in_stock: Only items with quantity > 0
+        """
+        if sort is None:
+            # No index holds storage order, so filter the category list in place
+            return [
+                item for item in self.storage.get_by_category(category)
+                if self._matches(item, min_price, max_price, in_stock)
+            ]
+        
+        # Walk the index whose range we can bisect; the output is then already
+        # ordered whenever the walk is in sort-field order.
+        if (min_price is not None or max_price is not None or sort == "price") and in_stock:
+            scan_field, order = "stock_price", "price"
+            low = (True, min_price) if min_price is not None else (True,)
+            high = (True, max_price if max_price is not None else math.inf)
+        elif min_price is not None or max_price is not None or sort == "price":
+            scan_field, order, low, high = "price", "price", min_price, max_price
+        elif sort == "quantity":
+            scan_field, order, low, high = "quantity", "quantity", (1 if in_stock else None), None
+        else:
+            scan_field, order, low, high = sort, sort, None, None
+        
+        items = []
+        for item_id in self._range(scan_field, category, low, high):
+            item = self._items[item_id]
+            if self._matches(item, min_price, max_price, in_stock):
+                items.append(item)
+        
+        if sort != order:
+            # Only the (already filtered) output gets sorted
+            key = INDEXED_FIELDS[sort]
+            items.sort(key=lambda item: (key(item), item.id))
+        if descending:
+            items.reverse()
+        return items
+    
+    @staticmethod
+    def _matches(item: InventoryItem, min_price: Optional[float], max_price: Optional[float], in_stock: bool) -> bool:
+        """Check an item against the price/stock filters."""
+        if in_stock and item.quantity <= 0:
+            return False
+        if min_price is not None and item.price < min_price:
+            return False
+        if max_price is not None and item.price > max_price:
+            return False
+        return True
+    
+    def _range(self, field: str, category: str, low: Any, high: Any):
+        """Yield item IDs in one category whose field value is within [low, high]."""
+        index = self._indexes[field]
+        if low is None:
+            start = bisect.bisect_left(index, (category,))
+        else:
+            start = bisect.bisect_left(index, (category, low, ""))
+        if high is None:
+            end = bisect.bisect_left(index, (category + "\0",))
+        else:
+            end = bisect.bisect_right(index, (category, high, MAX_ID))
+        
+        for i in range(start, end):
+            yield index[i][2]
+    
+    def _on_change(self, event: str, before: Optional[InventoryItem], after: Optional[InventoryItem]) -> None:
+        """Storage listener - apply one change to every index."""
+        if event == "load":
+            self._rebuild()
+            return
+        if before is not None:
+            self._remove(before)
+        if after is not None:
+            self._insert(after)
+    
+    def _rebuild(self) -> None:
+        """Build all indexes from scratch (on load)."""
+        self._items = {item.id: item for item in self.storage.items}
+        for field, key in INDEXED_FIELDS.items():
+            self._indexes[field] = sorted(
+                (item.category, key(item), item.id) for item in self._items.values()
+            )
+    
+    def _insert(self, item: InventoryItem) -> None:
+        """Add an item to every index."""
+        self._items[item.id] = item
+        for field, key in INDEXED_FIELDS.items():
+            bisect.insort(self._indexes[field], (item.category, key(item), item.id))
+    
+    def _remove(self, item: InventoryItem) -> None:
+        """Remove an item (as it was before the change) from every index."""
+        self._items.pop(item.id, None)
+        for field, key in INDEXED_FIELDS.items():
+            index = self._indexes[field]
+            entry = (item.category, key(item), item.id)
+            i = bisect.bisect_left(index, entry)
+            if i < len(index) and index[i] == entry:
+                del index[i]
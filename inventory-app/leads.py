@@ -0,0 +1,273 @@
+"""
+Lead Store - Append-Only Storage for Inbound Leads
+
+Implements directives/lead_handling.md. Each new lead or status change is
+appended to a JSONL journal (one JSON object per line), so ingesting a
+lead never rewrites the file. An in-memory index by status and email
+serves dashboards and duplicate checks, and the journal is compacted in a
+background thread once it is mostly superseded records.
+
+A torn last line (e.g. the process died mid-write) is dropped on load;
+every complete line before it is kept.
+"""
+import json
+import os
+import threading
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+
+STATUSES = ["NEW", "CONTACTED", "CONVERTED", "CLOSED"]
+OPEN_STATUSES = {"NEW", "CONTACTED"}
+
+# Compact when the journal holds this many times more records than leads
+COMPACT_RATIO = 2
+COMPACT_MIN_RECORDS = 1000
+
+
+@dataclass
+class Lead:
+    """A single inbound lead."""
+    id: str
+    timestamp: str  # ISO-8601
+    name: str
+    email: str
+    message: str
+    status: str = "NEW"
+    
+    def to_dict(self) -> dict:
+        """Convert to dictionary for JSON serialization."""
+        return {
+            "id": self.id,
+            "timestamp": self.timestamp,
+            "name": self.name,
+            "email": self.email,
+            "message": self.message,
+            "status": self.status,
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict) -> "Lead":
+        """Create from dictionary."""
+        return cls(
+            id=data["id"],
+            timestamp=data.get("timestamp", ""),
+            name=data.get("name", ""),
+            email=data.get("email", ""),
+            message=data.get("message", ""),
+            status=data.get("status", "NEW")
+        )
+
+
+class LeadStore:
+    """Journal-backed lead storage with status and email indexes."""
+    
+    def __init__(self, filepath: Optional[str] = None):
+        if filepath is None:
+            # Directive: leads live in the project's .tmp/ folder
+            root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+            filepath = os.path.join(root, ".tmp", "leads.jsonl")
+        self.filepath = filepath
+        
+        self.leads: Dict[str, Lead] = {}
+        self._by_status: Dict[str, Set[str]] = {status: set() for status in STATUSES}
+        self._by_email: Dict[str, str] = {}  # normalised email -> latest lead id
+        
+        self._lock = threading.Lock()
+        self._records = 0  # lines in the journal
+        self._compacting = False
+        self._append_failed = False  # a failed write may have left a torn line
+        
+        self.load()
+    
+    def load(self) -> None:
+        """Replay the journal into memory."""
+        self.leads = {}
+        self._by_status = {status: set() for status in STATUSES}
+        self._by_email = {}
+        self._records = 0
+        
+        if not os.path.exists(self.filepath):
+            return
+        
+        with open(self.filepath, "rb") as f:
+            data = f.read()
+        
+        # Drop a torn final line so the next append starts on a clean line
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            print(f"Dropping incomplete lead record ({len(data) - end} bytes)")
+            with open(self.filepath, "r+b") as f:
+                f.truncate(end)
+            data = data[:end]
+        
+        for line in data.splitlines():
+            try:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError(f"expected an object, got {type(record).__name__}")
+                self._replay(record)
+                self._records += 1
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                # ValueError covers JSONDecodeError and UnicodeDecodeError
+                print(f"Skipping corrupt lead record: {e}")
+    
+    def add(self, name: str, email: str, message: str) -> Tuple[Lead, bool]:
+        """
+        Ingest a lead, deduplicating against open leads with the same email.
+        
+        Returns:
+            Tuple of (lead, created) - created is False for a duplicate
+        """
+        with self._lock:
+            existing_id = self._by_email.get(email.strip().lower())
+            if existing_id and self.leads[existing_id].status in OPEN_STATUSES:
+                return self.leads[existing_id], False
+            
+            lead = Lead(
+                id=uuid.uuid4().hex[:12],
+                timestamp=datetime.now(timezone.utc).isoformat(),
+                name=name,
+                email=email,
+                message=message
+            )
+            record = {"op": "add", "lead": lead.to_dict()}
+            self._replay(record)
+            self._append(record)
+            lead = self.leads[lead.id]
+        self._maybe_compact()
+        return lead, True
+    
+    def set_status(self, lead_id: str, status: str) -> bool:
+        """Move a lead to a new status."""
+        if status not in STATUSES:
+            raise ValueError(f"Unknown lead status: {status}")
+        
+        with self._lock:
+            if lead_id not in self.leads:
+                return False
+            record = {"op": "status", "id": lead_id, "status": status}
+            self._replay(record)
+            self._append(record)
+        self._maybe_compact()
+        return True
+    
+    def get_by_id(self, lead_id: str) -> Optional[Lead]:
+        """Get a single lead by ID."""
+        return self.leads.get(lead_id)
+    
+    def get_by_email(self, email: str) -> Optional[Lead]:
+        """Get the most recent lead for an email address."""
+        lead_id = self._by_email.get(email.strip().lower())
+        return self.leads.get(lead_id) if lead_id else None
+    
+    def get_by_status(self, status: str) -> List[Lead]:
+        """Get leads with a status, oldest first."""
+        with self._lock:
+            leads = [self.leads[lead_id] for lead_id in self._by_status.get(status, ())]
+        return sorted(leads, key=lambda lead: lead.timestamp)
+    
+    def count_by_status(self) -> Dict[str, int]:
+        """Get lead counts per status (for dashboards)."""
+        with self._lock:
+            return {status: len(ids) for status, ids in self._by_status.items()}
+    
+    def compact(self) -> None:
+        """Rewrite the journal as one record per lead."""
+        with self._lock:
+            snapshot = [{"op": "add", "lead": lead.to_dict()} for lead in self.leads.values()]
+            offset = os.path.getsize(self.filepath) if os.path.exists(self.filepath) else 0
+        
+        tmp_path = self.filepath + ".compact"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in snapshot:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        
+        with self._lock:
+            # Carry over anything appended while the snapshot was being written
+            tail = b""
+            if os.path.exists(self.filepath):
+                with open(self.filepath, "rb") as f:
+                    f.seek(offset)
+                    tail = f.read()
+            with open(tmp_path, "ab") as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.filepath)
+            self._records = len(snapshot) + tail.count(b"\n")
+    
+    def _replay(self, record: dict) -> None:
+        """
+        Apply a journal record to the in-memory state and indexes.
+        
+        Raises:
+            ValueError: If the record has an unknown op or status (treated as corrupt on load)
+        """
+        if record["op"] == "add":
+            lead = Lead.from_dict(record["lead"])
+            if lead.status not in STATUSES:
+                raise ValueError(f"unknown lead status: {lead.status!r}")
+            previous = self.leads.get(lead.id)
+            if previous:
+                self._by_status[previous.status].discard(lead.id)
+            self.leads[lead.id] = lead
+            self._by_status[lead.status].add(lead.id)
+            self._by_email[lead.email.strip().lower()] = lead.id
+        elif record["op"] == "status":
+            if record["status"] not in STATUSES:
+                raise ValueError(f"unknown lead status: {record['status']!r}")
+            lead = self.leads.get(record["id"])
+            if lead:
+                self._by_status[lead.status].discard(lead.id)
+                lead.status = record["status"]
+                self._by_status[lead.status].add(lead.id)
+        else:
+            raise ValueError(f"unknown op: {record['op']!r}")
+    
+    def _append(self, record: dict) -> None:
+        """Append one record to the journal - caller must hold self._lock."""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        try:
+            os.makedirs(os.path.dirname(self.filepath), exist_ok=True)
+            with open(self.filepath, "ab") as f:
+                if self._append_failed and not self._ends_with_newline():
+                    # Start on a fresh line so this record isn't glued to a torn one
+                    f.write(b"\n")
+                f.write(line.encode("utf-8"))
+            self._append_failed = False
+            self._records += 1
+        except OSError as e:
+            self._append_failed = True
+            # Directive: log the entry for manual recovery if storage fails
+            print(f"Error saving lead ({e}), record follows:")
+            print(line, end="")
+    
+    def _ends_with_newline(self) -> bool:
+        """Check if the journal is empty or ends on a complete line."""
+        with open(self.filepath, "rb") as f:
+            if f.seek(0, os.SEEK_END) == 0:
+                return True
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+    
+    def _maybe_compact(self) -> None:
+        """Start a background compaction if the journal is mostly stale."""
+        with self._lock:
+            if self._compacting or self._records < COMPACT_MIN_RECORDS:
+                return
+            if self._records < COMPACT_RATIO * max(len(self.leads), 1):
+                return
+            self._compacting = True
+        
+        def run():
+            try:
+                self.compact()
+            except OSError as e:
+                print(f"Error compacting leads: {e}")
+            finally:
+                self._compacting = False
+        
+        threading.Thread(target=run, daemon=True).start()
@@ -4,9 +4,14 @@ Data Models for Cold Blooded Heartbeats Inventory
 from dataclasses import dataclass, field
 from typing import List, Optional
 from datetime import datetime
+import re
 import uuid
 
 
+# IDs made by InventoryItem.generate_id(), e.g. "AN-2026-03-14-9F2C"
+GENERATED_ID_PATTERN = re.compile(r"^[A-Z]{2}-(\d{4}-\d{2}-\d{2})-[0-9A-F]{4}$")
+
+
 @dataclass
 class FeedingEntry:
     """Single feeding log entry."""
@@ -44,6 +49,11 @@ class InventoryItem:
         short_uuid = uuid.uuid4().hex[:4].upper()
         return f"{prefix}-{date_str}-{short_uuid}"
     
+    def created_on(self) -> str:
+        """Get the creation date (YYYY-MM-DD) from a generate_id() ID, or "" if unknown."""
+        match = GENERATED_ID_PATTERN.match(self.id)
+        return match.group(1) if match else ""
+    
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
         data = {
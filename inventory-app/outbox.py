@@ -0,0 +1,272 @@
+"""
+Publish Outbox - Durable, Debounced Auto-Publishing
+
+Every inventory change marks the outbox dirty; nothing is uploaded per
+edit. Once edits have been quiet for a while (and the connectivity check
+passes) the outbox publishes one snapshot of the current state, so a
+burst of edits becomes a single upload. Pending work is saved to disk, so
+it survives restarts and failed publishes are retried with backoff.
+
+The snapshot is built on the thread that calls poll()/flush() (the Tk
+thread in the app), so build_files never races UI edits; only the
+uploads run on the background thread.
+"""
+import json
+import os
+import socket
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+from models import InventoryItem
+from storage import Storage
+
+
+DEFAULT_QUIET_SECONDS = 30
+RETRY_SECONDS = [30, 60, 120, 300, 600]  # backoff after failed attempts
+
+
+def github_reachable(timeout: float = 2.0) -> bool:
+    """Default connectivity check: can we open a socket to the GitHub API?"""
+    try:
+        with socket.create_connection(("api.github.com", 443), timeout=timeout):
+            return True
+    except OSError:
+        return False
+
+
+class PublishOutbox:
+    """Records pending publish work and flushes it when quiet and online."""
+    
+    def __init__(
+        self,
+        storage: Storage,
+        publisher,
+        build_files: Callable[[], Dict[str, str]],
+        filepath: Optional[str] = None,
+        quiet_seconds: float = DEFAULT_QUIET_SECONDS,
+        is_online: Optional[Callable[[], bool]] = None,
+        clock: Callable[[], float] = time.time,
+        on_published: Optional[Callable[[Dict[str, str]], None]] = None
+    ):
+        """
+        Args:
+            storage: Inventory to watch for changes
+            publisher: GitHubPublisher or GitPublisher
+            build_files: Returns repo path -> content for the current snapshot
+            filepath: Where pending state is persisted
+            quiet_seconds: Idle time after the last edit before auto-publishing
+            is_online: Connectivity check (stub it out in tests); defaults to
+                publisher.is_reachable, or a GitHub API probe if it has none
+            clock: Time source (injectable for tests)
+            on_published: Called with the uploaded files after a successful flush
+        """
+        if filepath is None:
+            filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "outbox.json")
+        self.filepath = filepath
+        self.storage = storage
+        self.publisher = publisher
+        self.build_files = build_files
+        self.quiet_seconds = quiet_seconds
+        self.is_online = is_online or getattr(publisher, "is_reachable", github_reachable)
+        self.clock = clock
+        self.on_published = on_published
+        
+        self._lock = threading.Lock()
+        self._flushing = False
+        self.last_result: Optional[Tuple[bool, str]] = None
+        self.state = self._load()
+        
+        storage.add_listener(self._on_change)
+    
+    @property
+    def pending(self) -> bool:
+        """Check if there is unpublished work."""
+        return self.state["generation"] > self.state["published_generation"] or bool(self.state["images"])
+    
+    def mark_pending(self) -> None:
+        """Record that the current snapshot needs publishing."""
+        with self._lock:
+            self.state["generation"] += 1
+            self.state["last_change"] = self.clock()
+            self.state["next_attempt"] = 0
+            self._save()
+    
+    def queue_image(self, local_path: str, repo_path: str) -> None:
+        """Add an image upload to the outbox (re-queueing a path replaces it)."""
+        with self._lock:
+            self.state["images"][repo_path] = local_path
+            self.state["last_change"] = self.clock()
+            self._save()
+    
+    def due(self) -> bool:
+        """Check if an automatic flush should start now."""
+        with self._lock:
+            if self._flushing or not self.pending:
+                return False
+            now = self.clock()
+            return (
+                now - self.state["last_change"] >= self.quiet_seconds
+                and now >= self.state["next_attempt"]
+            )
+    
+    def poll(self) -> bool:
+        """
+        Start a background flush if one is due. Returns True if started.
+        
+        The snapshot is built here, on the caller's thread; only the
+        uploads happen in the background.
+        """
+        if not self.due() or not self.publisher.is_configured():
+            return False
+        with self._lock:
+            if self._flushing:
+                return False
+            self._flushing = True
+        
+        snapshot = self._snapshot()
+        if snapshot is None:
+            return False
+        threading.Thread(target=self._run_flush, args=snapshot, daemon=True).start()
+        return True
+    
+    def flush(self) -> Tuple[bool, str]:
+        """
+        Publish everything pending right now (images first, then the snapshot).
+        
+        Returns:
+            Tuple of (success, message)
+        """
+        with self._lock:
+            if self._flushing:
+                return False, "A publish is already in progress"
+            self._flushing = True
+        
+        snapshot = self._snapshot()
+        if snapshot is None:
+            return self.last_result
+        return self._run_flush(*snapshot)
+    
+    def _snapshot(self) -> Optional[Tuple[int, Dict[str, str], Optional[Dict[str, str]]]]:
+        """
+        Capture what the flush will upload: (generation, images, files).
+        
+        files is None when only images are pending. If the files can't be
+        built, the attempt is recorded as failed, the flush ends and None
+        is returned.
+        """
+        with self._lock:
+            generation = self.state["generation"]
+            images = dict(self.state["images"])
+            published = self.state["published_generation"]
+        try:
+            files = self.build_files() if generation > published else None
+        except Exception as e:
+            self._end_flush()
+            self._failed(f"Could not build publish files: {e}")
+            return None
+        return generation, images, files
+    
+    def _run_flush(self, generation: int, images: Dict[str, str], files: Optional[Dict[str, str]]) -> Tuple[bool, str]:
+        """Upload a snapshot, turning any publisher exception into a failed attempt."""
+        try:
+            return self._flush(generation, images, files)
+        except Exception as e:
+            # e.g. requests.ConnectionError when the network drops mid-publish
+            return self._failed(f"Publish failed: {e}")
+        finally:
+            self._end_flush()
+    
+    def _end_flush(self) -> None:
+        """Allow the next flush to start."""
+        with self._lock:
+            self._flushing = False
+    
+    def _flush(self, generation: int, images: Dict[str, str], files: Optional[Dict[str, str]]) -> Tuple[bool, str]:
+        """Do the uploads for flush()."""
+        if not self.is_online():
+            return self._failed("Offline - will publish when connectivity returns")
+        
+        for repo_path, local_path in images.items():
+            success, message = self.publisher.publish_image(local_path, repo_path)
+            if not success:
+                return self._failed(message)
+            with self._lock:
+                if self.state["images"].get(repo_path) == local_path:
+                    del self.state["images"][repo_path]
+                self._save()
+        
+        if files is not None:
+            if hasattr(self.publisher, "publish_files"):
+                # Git backend - every file in one commit
+                success, message = self.publisher.publish_files(
+                    {path: content.encode("utf-8") for path, content in files.items()},
+                    "Update inventory from desktop app"
+                )
+                if not success:
+                    return self._failed(message)
+            else:
+                for repo_path, content in files.items():
+                    success, message = self.publisher.publish_file(
+                        repo_path, content, "Update inventory from desktop app"
+                    )
+                    if not success:
+                        return self._failed(message)
+            if self.on_published:
+                self.on_published(files)
+        
+        with self._lock:
+            # Edits made while uploading stay pending for the next flush
+            self.state["published_generation"] = max(self.state["published_generation"], generation)
+            self.state["attempts"] = 0
+            self.state["last_error"] = ""
+            self._save()
+        self.last_result = (True, "Published!")
+        return self.last_result
+    
+    def _failed(self, message: str) -> Tuple[bool, str]:
+        """Record a failed attempt and schedule the retry."""
+        with self._lock:
+            attempts = self.state["attempts"]
+            self.state["attempts"] = attempts + 1
+            self.state["last_error"] = message
+            self.state["next_attempt"] = self.clock() + RETRY_SECONDS[min(attempts, len(RETRY_SECONDS) - 1)]
+            self._save()
+        self.last_result = (False, message)
+        return self.last_result
+    
+    def _on_change(self, event: str, before: Optional[InventoryItem], after: Optional[InventoryItem]) -> None:
+        """Storage listener - coalesce the edit and pick up new images."""
+        if event == "load":
+            return
+        if after is not None and after.image and (before is None or before.image != after.image):
+            local_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets", os.path.basename(after.image))
+            if os.path.exists(local_path):
+                self.queue_image(local_path, f"docs/{after.image}")
+        self.mark_pending()
+    
+    def _load(self) -> dict:
+        """Load pending state from disk."""
+        state = {
+            "generation": 0,
+            "published_generation": 0,
+            "last_change": 0.0,
+            "next_attempt": 0.0,
+            "attempts": 0,
+            "last_error": "",
+            "images": {},
+        }
+        if os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, "r", encoding="utf-8") as f:
+                    state.update(json.load(f))
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"Error loading outbox: {e}")
+        return state
+    
+    def _save(self) -> None:
+        """Persist pending state atomically - caller must hold self._lock."""
+        tmp_path = self.filepath + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f, indent=2)
+        os.replace(tmp_path, self.filepath)
@@ -0,0 +1,469 @@
+"""
+Reservation Engine - Holds and Checkout for Inventory Stock
+
+Checkouts first place a short-lived hold on stock, then confirm it once
+payment goes through. Holds live only in memory: stock is written to
+Storage (via compare-and-set) when a hold is confirmed, so an abandoned
+or crashed checkout never leaves the inventory file half-reserved.
+
+Confirmed sales are group-committed: each confirm changes stock in memory
+and then waits for a save that includes it, so a burst of checkouts shares
+one rewrite of inventory.json instead of paying for one each.
+
+Single writer: Storage keeps the whole inventory in memory and rewrites the
+file on save, so only one process may own an inventory file at a time. Do
+not run `serve` against the desktop app's inventory.json while the app is
+open - whichever process saves last silently discards the other's changes
+(compare-and-set only protects writers within one process). Point the
+service at its own file with --inventory.
+
+Usage:
+    python reservations.py serve [--port 8765] [--inventory path/to/inventory.json]
+    python reservations.py loadtest [--attempts 2000] [--concurrency 64] [--stock 25] [--catalogue 5000]
+"""
+import argparse
+import heapq
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+import requests
+
+from models import InventoryItem
+from shipping_guard import OpenMeteoForecastProvider, ShippingGuard, StaticForecastProvider
+from storage import Storage
+
+
+DEFAULT_HOLD_SECONDS = 600  # 10 minutes to finish checkout
+CAS_RETRIES = 5
+SAVE_FAILED = "Sale recorded but could not be saved"
+
+
+@dataclass
+class Hold:
+    """Stock held for a checkout that has not been confirmed yet."""
+    id: str
+    item_id: str
+    quantity: int
+    expires_at: float
+    hold_for_pickup: bool = False  # ship to the FedEx hub, not the door (cold destination)
+
+
+class ReservationEngine:
+    """Places, confirms and expires holds on top of Storage."""
+    
+    def __init__(
+        self,
+        storage: Storage,
+        hold_seconds: float = DEFAULT_HOLD_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+        shipping_guard: Optional[ShippingGuard] = None
+    ):
+        self.storage = storage
+        self.hold_seconds = hold_seconds
+        self.clock = clock
+        self.shipping_guard = shipping_guard
+        
+        self._lock = threading.Lock()
+        self._holds: Dict[str, Hold] = {}
+        self._held: Dict[str, int] = {}  # item_id -> quantity currently held
+        self._expiry_heap: List[Tuple[float, str]] = []
+        
+        # Group commit: sales are numbered, and one confirm at a time saves
+        # every sale recorded so far while the others wait for it
+        self._save_cond = threading.Condition()
+        self._sales_recorded = 0
+        self._sales_saved = 0
+        self._saving = False
+    
+    def available(self, item_id: str) -> int:
+        """Get the quantity of an item that can still be reserved."""
+        with self._lock:
+            self._expire()
+            return self._available(item_id)
+    
+    def reserve(self, item_id: str, quantity: int = 1, zip_code: Optional[str] = None) -> Tuple[Optional[Hold], str]:
+        """
+        Place a time-limited hold on stock.
+        
+        Args:
+            item_id: Inventory item ID (SKU)
+            quantity: Units to hold
+            zip_code: Destination ZIP, checked against the shipping guard for live
+                animals (required for them when a guard is configured)
+        
+        Returns:
+            Tuple of (hold or None, message)
+        """
+        if quantity < 1:
+            return None, "Quantity must be at least 1"
+        
+        # Weather check happens outside the lock - it may wait on a forecast fetch
+        item = self.storage.get_by_id(item_id)
+        hold_for_pickup = False
+        if self.shipping_guard and item is not None and item.category == "animals":
+            if not zip_code:
+                return None, "A destination ZIP code is required for live animals"
+            decision = self.shipping_guard.check(str(zip_code))
+            if not decision.allowed:
+                return None, decision.reason
+            hold_for_pickup = decision.hold_for_pickup
+        
+        with self._lock:
+            self._expire()
+            if self.storage.get_by_id(item_id) is None:
+                return None, f"Unknown item: {item_id}"
+            if self._available(item_id) < quantity:
+                return None, "Not enough stock available"
+            
+            hold = Hold(
+                id=uuid.uuid4().hex,
+                item_id=item_id,
+                quantity=quantity,
+                expires_at=self.clock() + self.hold_seconds,
+                hold_for_pickup=hold_for_pickup
+            )
+            self._holds[hold.id] = hold
+            self._held[item_id] = self._held.get(item_id, 0) + quantity
+            heapq.heappush(self._expiry_heap, (hold.expires_at, hold.id))
+            return hold, "Reserved"
+    
+    def confirm(self, hold_id: str) -> Tuple[bool, str]:
+        """
+        Turn a hold into a sale, decrementing stock in Storage.
+        
+        Live animals are marked sold as soon as their last unit goes. Returns
+        only once the sale has been saved to disk. If the save fails the
+        sale stays applied in memory (the hold is used up) and is written by
+        the next save that succeeds; the message then starts with SAVE_FAILED.
+        
+        Returns:
+            Tuple of (success, message)
+        """
+        success, message, sale = self._record_sale(hold_id)
+        if success:
+            error = self._wait_until_saved(sale)
+            if error is not None:
+                print(f"Error saving sale: {error}")
+                return False, f"{SAVE_FAILED} ({error}) - it will be written by the next successful save"
+        return success, message
+    
+    def _record_sale(self, hold_id: str) -> Tuple[bool, str, int]:
+        """Apply a confirmed hold to Storage in memory. Returns (success, message, sale number)."""
+        with self._lock:
+            self._expire()
+            hold = self._holds.get(hold_id)
+            if hold is None:
+                return False, "Hold not found or expired", 0
+            
+            # The engine lock serialises checkouts; the compare-and-set guards
+            # against the item being edited elsewhere (e.g. the desktop UI).
+            for _ in range(CAS_RETRIES):
+                item = self.storage.get_by_id(hold.item_id)
+                if item is None or item.status == "sold" or item.quantity < hold.quantity:
+                    self._drop(hold)
+                    return False, "Item is no longer available", 0
+                
+                remaining = item.quantity - hold.quantity
+                changes = {"quantity": remaining}
+                if remaining == 0 and item.category == "animals":
+                    changes["status"] = "sold"
+                
+                expected = {"quantity": item.quantity, "status": item.status}
+                if self.storage.compare_and_set(item.id, expected, changes, save=False):
+                    self._drop(hold)
+                    message = "Purchase confirmed"
+                    if hold.hold_for_pickup:
+                        message += " - hold for pickup at FedEx hub"
+                    with self._save_cond:
+                        self._sales_recorded += 1
+                        return True, message, self._sales_recorded
+            
+            return False, "Item is being edited, please retry", 0
+    
+    def _wait_until_saved(self, sale: int) -> Optional[str]:
+        """
+        Block until a save covering the given sale has finished, doing it if nobody is.
+        
+        Returns:
+            None once saved, or the error if this confirm's own save attempt failed
+            (confirms that were waiting on a failed save wake up and try again)
+        """
+        with self._save_cond:
+            while self._sales_saved < sale:
+                if self._saving:
+                    self._save_cond.wait()
+                    continue
+                
+                self._saving = True
+                target = self._sales_recorded
+                self._save_cond.release()
+                error = None
+                try:
+                    self.storage.save()
+                except OSError as e:
+                    error = str(e)
+                finally:
+                    self._save_cond.acquire()
+                    self._saving = False
+                    self._save_cond.notify_all()
+                if error is not None:
+                    return error
+                self._sales_saved = max(self._sales_saved, target)
+        return None
+    
+    def release(self, hold_id: str) -> bool:
+        """Give held stock back (e.g. cart abandoned)."""
+        with self._lock:
+            hold = self._holds.get(hold_id)
+            if hold is None:
+                return False
+            self._drop(hold)
+            return True
+    
+    def _available(self, item_id: str) -> int:
+        """Unlocked availability check - caller must hold self._lock."""
+        item = self.storage.get_by_id(item_id)
+        if item is None or item.status != "available":
+            return 0
+        return max(0, item.quantity - self._held.get(item_id, 0))
+    
+    def _drop(self, hold: Hold) -> None:
+        """Remove a hold and return its quantity to the pool."""
+        del self._holds[hold.id]
+        left = self._held[hold.item_id] - hold.quantity
+        if left:
+            self._held[hold.item_id] = left
+        else:
+            del self._held[hold.item_id]
+    
+    def _expire(self) -> None:
+        """Drop every hold whose time is up (confirmed/released ones are skipped)."""
+        now = self.clock()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, hold_id = heapq.heappop(self._expiry_heap)
+            hold = self._holds.get(hold_id)
+            if hold is not None:
+                self._drop(hold)
+
+
+class ReservationHandler(BaseHTTPRequestHandler):
+    """
+    JSON endpoints:
+        GET  /items/<id>   -> {"item_id", "available"}
+        POST /reserve      {"item_id", "quantity", "zip"?} -> {"hold_id", "expires_in", "hold_for_pickup"}
+        POST /confirm      {"hold_id"}
+        POST /release      {"hold_id"}
+    """
+    engine: ReservationEngine  # set on the server subclass
+    
+    def do_GET(self):
+        if self.path.startswith("/items/"):
+            item_id = self.path[len("/items/"):]
+            self._send(200, {"item_id": item_id, "available": self.engine.available(item_id)})
+        else:
+            self._send(404, {"error": "Not found"})
+    
+    def do_POST(self):
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except (ValueError, json.JSONDecodeError):
+            self._send(400, {"error": "Invalid JSON body"})
+            return
+        if not isinstance(body, dict):
+            self._send(400, {"error": "JSON body must be an object"})
+            return
+        
+        if self.path == "/reserve":
+            try:
+                quantity = int(body.get("quantity", 1))
+            except (TypeError, ValueError):
+                self._send(400, {"error": "quantity must be an integer"})
+                return
+            hold, message = self.engine.reserve(
+                str(body.get("item_id", "")),
+                quantity,
+                body.get("zip")
+            )
+            if hold:
+                expires_in = max(0.0, hold.expires_at - self.engine.clock())
+                self._send(200, {
+                    "hold_id": hold.id,
+                    "expires_in": round(expires_in, 1),
+                    "hold_for_pickup": hold.hold_for_pickup,
+                })
+            else:
+                self._send(409, {"error": message})
+        elif self.path == "/confirm":
+            success, message = self.engine.confirm(str(body.get("hold_id", "")))
+            if success:
+                status = 200
+            elif message.startswith(SAVE_FAILED):
+                status = 500
+            else:
+                status = 409
+            self._send(status, {"ok": success, "message": message})
+        elif self.path == "/release":
+            success = self.engine.release(str(body.get("hold_id", "")))
+            self._send(200 if success else 404, {"ok": success})
+        else:
+            self._send(404, {"error": "Not found"})
+    
+    def _send(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        # Keep the console quiet under load
+        pass
+
+
+class ReservationServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for checkout bursts."""
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def make_server(engine: ReservationEngine, host: str = "127.0.0.1", port: int = 8765) -> ReservationServer:
+    """Create (but don't start) an HTTP server bound to the engine."""
+    handler = type("BoundReservationHandler", (ReservationHandler,), {"engine": engine})
+    return ReservationServer((host, port), handler)
+
+
+def run_load_test(attempts: int = 2000, concurrency: int = 64, stock: int = 25, catalogue: int = 5000) -> dict:
+    """
+    Hammer a local server with concurrent reserve+confirm checkouts on one SKU.
+    
+    The SKU sits in a catalogue of realistic size, since every save rewrites
+    the whole inventory file.
+    
+    Returns a summary dict; "oversold" must always be False.
+    """
+    tmp_dir = tempfile.mkdtemp(prefix="cbh-loadtest-")
+    storage = Storage(os.path.join(tmp_dir, "inventory.json"))
+    item = InventoryItem(
+        id=InventoryItem.generate_id("pantry"),
+        category="pantry",
+        name="Load Test Crickets",
+        variant="Large",
+        price=9.99,
+        quantity=stock,
+        image=""
+    )
+    with storage.batch():
+        for i in range(max(catalogue - 1, 0)):
+            storage.add(InventoryItem(
+                id=f"PT-2026-01-01-{i:04X}",
+                category="pantry",
+                name=f"Feeder {i}",
+                variant="Medium",
+                price=12.5,
+                quantity=10,
+                image=""
+            ))
+        storage.add(item)
+    
+    server = make_server(ReservationEngine(storage), port=0)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    def checkout(_):
+        try:
+            with requests.Session() as session:
+                response = session.post(f"{base_url}/reserve", json={"item_id": item.id, "quantity": 1})
+                if response.status_code != 200:
+                    return "rejected"
+                hold_id = response.json()["hold_id"]
+                response = session.post(f"{base_url}/confirm", json={"hold_id": hold_id})
+                return "sold" if response.status_code == 200 else "failed"
+        except requests.RequestException:
+            return "error"
+    
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(checkout, range(attempts)))
+    elapsed = time.perf_counter() - started
+    server.shutdown()
+    
+    final = Storage(storage.filepath).get_by_id(item.id)
+    sold = results.count("sold")
+    return {
+        "attempts": attempts,
+        "concurrency": concurrency,
+        "catalogue": len(storage.items),
+        "stock": stock,
+        "sold": sold,
+        "rejected": results.count("rejected"),
+        "failed": results.count("failed"),
+        "errors": results.count("error"),
+        "remaining": final.quantity,
+        "oversold": sold > stock or final.quantity != stock - sold,
+        "seconds": round(elapsed, 2),
+        "attempts_per_second": round(attempts / elapsed, 1),
+        "confirms_per_second": round(sold / elapsed, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inventory reservation service")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    serve = sub.add_parser("serve", help="Serve the reservation endpoint")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8765)
+    serve.add_argument("--hold-seconds", type=float, default=DEFAULT_HOLD_SECONDS)
+    serve.add_argument(
+        "--inventory",
+        help="Inventory file owned by the service (default: the desktop app's - close the app first)"
+    )
+    serve.add_argument(
+        "--forecast-file",
+        help='JSON of {"ZIP": [low_f, high_f]} to use instead of live Open-Meteo forecasts'
+    )
+    
+    load = sub.add_parser("loadtest", help="Run concurrent checkouts against a scratch inventory")
+    load.add_argument("--attempts", type=int, default=2000)
+    load.add_argument("--concurrency", type=int, default=64)
+    load.add_argument("--stock", type=int, default=25)
+    load.add_argument("--catalogue", type=int, default=5000, help="Items in the scratch inventory")
+    
+    args = parser.parse_args()
+    
+    if args.command == "serve":
+        if args.forecast_file:
+            provider = StaticForecastProvider.from_file(args.forecast_file)
+        else:
+            provider = OpenMeteoForecastProvider()
+        engine = ReservationEngine(
+            Storage(args.inventory),
+            hold_seconds=args.hold_seconds,
+            shipping_guard=ShippingGuard(provider)
+        )
+        server = make_server(engine, args.host, args.port)
+        print(f"Reservation service on http://{args.host}:{args.port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+    else:
+        summary = run_load_test(args.attempts, args.concurrency, args.stock, args.catalogue)
+        print(json.dumps(summary, indent=2))
+        if summary["oversold"]:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""
+Storefront Search Index - Precomputed Token and Document Shards
+
+Builds a search index over item names, variants and SKUs for the static
+site, so docs/app.js can search by fetching a few small files instead of
+the whole inventory.json. Sold items are left out.
+
+Layout (under the search path, e.g. docs/search/):
+    manifest.json       {"version", "sharded", "shard_length", "compound_shard_length",
+                         "token_shards": [...], "doc_shards": n, "categories": [...]}
+    tokens_<key>.json   {token: [ids]}
+    docs_<n>.json       {id: [name, variant, category, price, image]}
+
+Tokens are the words of the name and variant, plus hyphenated terms kept
+whole: the SKU ("pt-2026-03-14-ab12") and compounds like "blue-tongue".
+A plain query term only matches words and a hyphenated one only matches
+hyphenated tokens, so results don't depend on the layout.
+Small catalogues keep every token in one shard ("all"); larger ones shard
+plain words by their first SHARD_LENGTH characters and hyphenated terms by
+their first COMPOUND_SHARD_LENGTH (so SKUs split by category and month).
+Hyphenated shard keys always contain a "-", which is how app.js tells the
+two kinds apart.
+Category is not a token - it is stored on each document and listed in the
+manifest for filtering. Each document is stored once, in the doc shard
+picked by doc_shard_of(), which app.js computes the same way.
+
+The index is maintained from Storage change events: edits that don't touch
+a field it shows dirty nothing, a price change dirties only a doc shard,
+and only dirty files are republished.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+from typing import Dict, Optional, Set, Tuple
+
+from models import InventoryItem
+from storage import Storage
+
+
+SHARD_LENGTH = 2
+COMPOUND_SHARD_LENGTH = 10  # "pt-2026-03" - SKU category and month
+SINGLE_SHARD_MAX = 500  # documents before switching to prefix token shards
+DOCS_PER_SHARD = 200  # target documents per doc shard
+TERM_PATTERN = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+
+# What the index shows for a document: (name, variant, category, price, image)
+DocFields = Tuple[str, str, str, float, str]
+
+
+def tokenize(item: InventoryItem) -> Set[str]:
+    """Get the search tokens for an item (the same pattern app.js splits queries with)."""
+    tokens = set(TERM_PATTERN.findall(item.id.lower()))
+    for term in TERM_PATTERN.findall(f"{item.name} {item.variant}".lower()):
+        tokens.add(term)
+        tokens.update(term.split("-"))
+    return tokens
+
+
+def doc_shard_of(item_id: str, count: int) -> int:
+    """Doc shard holding an item (31-multiplier string hash, matched in app.js)."""
+    h = 0
+    for ch in item_id:
+        h = (h * 31 + ord(ch)) & 0xFFFFFFFF
+    return h % count
+
+
+class SearchIndex:
+    """Incrementally maintained, shard-publishable search index."""
+    
+    def __init__(self, storage: Storage, search_path: str = "docs/search", state_path: Optional[str] = None):
+        """
+        Args:
+            storage: Inventory to index
+            search_path: Repo folder the shards are published to
+            state_path: Local file remembering what was last published
+        """
+        if state_path is None:
+            state_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "search_index_state.json")
+        self.storage = storage
+        self.search_path = search_path.rstrip("/")
+        self.state_path = state_path
+        
+        self._docs: Dict[str, DocFields] = {}
+        self._tokens: Dict[str, Set[str]] = {}  # item id -> tokens
+        self._postings: Dict[str, Set[str]] = {}  # token -> item ids
+        self._shard_tokens: Dict[str, Set[str]] = {}  # token shard key -> tokens
+        self._doc_members: Dict[int, Set[str]] = {}  # doc shard -> item ids
+        self._sharded = False
+        self._doc_shards = 1
+        
+        # Repo paths whose content may differ from the last publish
+        self._dirty: Set[str] = set()
+        
+        # Shards are rendered on the outbox's worker thread
+        self._lock = threading.Lock()
+        
+        # Content hash of every file as last published (path -> sha1)
+        self._published: Dict[str, str] = self._load_state()
+        
+        storage.add_listener(self._on_change)
+    
+    def pending_files(self) -> Dict[str, str]:
+        """Get the shard/manifest files that differ from what was last published."""
+        with self._lock:
+            files = {}
+            for path in sorted(self._dirty | {self._manifest_path()}):
+                content = self._render(path)
+                if content is None:
+                    # A file from an older index layout - nothing reads it now
+                    self._published.pop(path, None)
+                    self._dirty.discard(path)
+                elif self._published.get(path) == self._hash(content):
+                    self._dirty.discard(path)
+                else:
+                    files[path] = content
+            return files
+    
+    def mark_published(self, files: Dict[str, str]) -> None:
+        """Record files as published (call after a successful upload)."""
+        with self._lock:
+            for path, content in files.items():
+                self._published[path] = self._hash(content)
+                # A file edited again during the upload stays dirty
+                if self._render(path) == content:
+                    self._dirty.discard(path)
+            self._save_state()
+    
+    def _on_change(self, event: str, before: Optional[InventoryItem], after: Optional[InventoryItem]) -> None:
+        """Storage listener - reindex only when a field the index shows changed."""
+        with self._lock:
+            if event == "load":
+                self._rebuild()
+                return
+            
+            if before is not None and after is not None and self._fields(before) == self._fields(after):
+                return
+            if before is not None and (after is None or after.id != before.id):
+                self._set(before.id, None)
+            if after is not None:
+                self._set(after.id, after if after.status != "sold" else None)
+            self._check_layout()
+    
+    def _fields(self, item: InventoryItem) -> Optional[Tuple]:
+        """Everything the index depends on (None for items left out)."""
+        if item.status == "sold":
+            return None
+        return (item.id, item.name, item.variant, item.category, item.price, item.image)
+    
+    def _rebuild(self) -> None:
+        """Index every unsold item from scratch (on load)."""
+        self._docs, self._tokens, self._postings = {}, {}, {}
+        self._shard_tokens, self._doc_members = {}, {}
+        items = [item for item in self.storage.items if item.status != "sold"]
+        self._sharded = len(items) > SINGLE_SHARD_MAX
+        self._doc_shards = 1
+        while len(items) > self._doc_shards * DOCS_PER_SHARD:
+            self._doc_shards *= 2
+        
+        for item in items:
+            self._set(item.id, item)
+        self._relayout()
+        
+        # Previously published files that are no longer current get emptied
+        self._dirty = self._current_paths() | (set(self._published) - {self._manifest_path()})
+    
+    def _set(self, item_id: str, item: Optional[InventoryItem]) -> None:
+        """Index an item's current version (None removes it), dirtying only what changed."""
+        old_tokens = self._tokens.pop(item_id, set())
+        new_tokens = tokenize(item) if item is not None else set()
+        
+        for token in old_tokens - new_tokens:
+            ids = self._postings[token]
+            ids.discard(item_id)
+            shard = self._shard_of(token)
+            self._dirty.add(self._token_path(shard))
+            if not ids:
+                del self._postings[token]
+                tokens = self._shard_tokens.get(shard)
+                if tokens is not None:
+                    tokens.discard(token)
+                    if not tokens:
+                        del self._shard_tokens[shard]
+        for token in new_tokens - old_tokens:
+            self._postings.setdefault(token, set()).add(item_id)
+            shard = self._shard_of(token)
+            self._shard_tokens.setdefault(shard, set()).add(token)
+            self._dirty.add(self._token_path(shard))
+        
+        doc_shard = doc_shard_of(item_id, self._doc_shards)
+        if item is None:
+            if self._docs.pop(item_id, None) is not None:
+                self._doc_members[doc_shard].discard(item_id)
+                self._dirty.add(self._doc_path(doc_shard))
+            return
+        self._tokens[item_id] = new_tokens
+        self._docs[item_id] = (item.name, item.variant, item.category, item.price, item.image)
+        self._doc_members.setdefault(doc_shard, set()).add(item_id)
+        self._dirty.add(self._doc_path(doc_shard))
+    
+    def _check_layout(self) -> None:
+        """Re-shard when the catalogue crosses a size threshold (shrinking lags to avoid flapping)."""
+        count = len(self._docs)
+        sharded = count > SINGLE_SHARD_MAX
+        doc_shards = self._doc_shards
+        if count > doc_shards * DOCS_PER_SHARD:
+            doc_shards *= 2
+        elif doc_shards > 1 and count <= doc_shards * DOCS_PER_SHARD // 4:
+            doc_shards //= 2
+        if sharded == self._sharded and doc_shards == self._doc_shards:
+            return
+        
+        old_paths = self._current_paths()
+        self._sharded = sharded
+        self._doc_shards = doc_shards
+        self._relayout()
+        self._dirty |= old_paths | self._current_paths()
+    
+    def _relayout(self) -> None:
+        """Regroup tokens and documents into shards for the current layout."""
+        self._shard_tokens = {}
+        for token in self._postings:
+            self._shard_tokens.setdefault(self._shard_of(token), set()).add(token)
+        self._doc_members = {}
+        for item_id in self._docs:
+            self._doc_members.setdefault(doc_shard_of(item_id, self._doc_shards), set()).add(item_id)
+    
+    def _shard_of(self, token: str) -> str:
+        """Token shard key a token is stored under."""
+        if not self._sharded:
+            return "all"
+        if "-" not in token:
+            return token[:SHARD_LENGTH]
+        key = token[:COMPOUND_SHARD_LENGTH]
+        # A first word longer than the prefix would give a key app.js takes for plain words
+        return key if "-" in key else key + "-"
+    
+    def _current_paths(self) -> Set[str]:
+        """Every shard file the current layout publishes."""
+        paths = {self._token_path(shard) for shard in self._shard_tokens}
+        paths |= {self._doc_path(n) for n in range(self._doc_shards)}
+        return paths
+    
+    def _token_path(self, shard: str) -> str:
+        """Repo path of a token shard."""
+        return f"{self.search_path}/tokens_{shard}.json"
+    
+    def _doc_path(self, shard: int) -> str:
+        """Repo path of a doc shard."""
+        return f"{self.search_path}/docs_{shard}.json"
+    
+    def _manifest_path(self) -> str:
+        """Repo path of the manifest."""
+        return f"{self.search_path}/manifest.json"
+    
+    def _render(self, path: str) -> Optional[str]:
+        """Serialise a file (emptied shards render as {}; None for unknown paths)."""
+        name = path[len(self.search_path) + 1:]
+        if name == "manifest.json":
+            return json.dumps({
+                "version": 2,
+                "sharded": self._sharded,
+                "shard_length": SHARD_LENGTH,
+                "compound_shard_length": COMPOUND_SHARD_LENGTH,
+                "token_shards": sorted(self._shard_tokens),
+                "doc_shards": self._doc_shards,
+                "categories": sorted({doc[2] for doc in self._docs.values()}),
+            }, separators=(",", ":"))
+        
+        if name.startswith("tokens_") and name.endswith(".json"):
+            shard = name[len("tokens_"):-len(".json")]
+            content = {token: sorted(self._postings[token]) for token in sorted(self._shard_tokens.get(shard, ()))}
+        elif name.startswith("docs_") and name.endswith(".json") and name[len("docs_"):-len(".json")].isdigit():
+            shard = int(name[len("docs_"):-len(".json")])
+            members = self._doc_members.get(shard, ()) if shard < self._doc_shards else ()
+            content = {item_id: list(self._docs[item_id]) for item_id in sorted(members)}
+        else:
+            return None
+        return json.dumps(content, separators=(",", ":"), ensure_ascii=False)
+    
+    @staticmethod
+    def _hash(content: str) -> str:
+        """Content fingerprint for change detection."""
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()
+    
+    def _load_state(self) -> Dict[str, str]:
+        """Load the hashes of previously published files."""
+        if os.path.exists(self.state_path):
+            try:
+                with open(self.state_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"Error loading search index state: {e}")
+        return {}
+    
+    def _save_state(self) -> None:
+        """Save the hashes of published files."""
+        with open(self.state_path, "w", encoding="utf-8") as f:
+            json.dump(self._published, f, indent=2)
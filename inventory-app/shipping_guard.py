@@ -0,0 +1,319 @@
+"""
+Shipping Guard - Weather Rules for Live Animal Shipments
+
+Applies the temperature and ship-day rules from
+directives/shipping_protocols.md to a destination ZIP code.
+
+The temperature rules apply to the day of delivery, so a check for a
+future ship date uses the forecast for that date plus TRANSIT_DAYS, not
+today's weather.
+
+Forecasts come from a pluggable ForecastProvider and are kept in a TTL
+cache keyed by ZIP (or ZIP prefix region) and date. Concurrent checkouts that miss
+the cache within a short window are folded into one provider call, and a
+ZIP already being fetched is never requested twice.
+
+OpenMeteoForecastProvider is the live source; StaticForecastProvider
+serves fixed values for tests and offline use.
+"""
+import json
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import requests
+
+
+# Temperature thresholds (°F)
+BLOCK_BELOW_F = 30
+HOLD_BELOW_F = 40
+BLOCK_ABOVE_F = 90
+
+SHIP_WEEKDAYS = (0, 1, 2)  # Monday, Tuesday, Wednesday
+TRANSIT_DAYS = 1  # overnight - the animal arrives the day after it ships
+
+DEFAULT_TTL_SECONDS = 30 * 60
+DEFAULT_BATCH_WINDOW = 0.05
+
+
+@dataclass
+class Forecast:
+    """One day's forecast for a destination."""
+    zip_code: str
+    low_f: float
+    high_f: float
+    day: Optional[date] = None
+
+
+@dataclass
+class ShippingDecision:
+    """Result of a shipping check."""
+    allowed: bool
+    hold_for_pickup: bool
+    reason: str
+    forecast: Optional[Forecast] = None
+
+
+class ForecastProvider(ABC):
+    """Base class for weather sources. Subclasses fetch many ZIPs per call."""
+    
+    @abstractmethod
+    def fetch(self, zip_codes: List[str], day: date) -> Dict[str, Forecast]:
+        """
+        Fetch forecasts for several ZIP codes at once.
+        
+        Args:
+            zip_codes: Distinct ZIP codes to look up
+            day: Date the forecasts must cover
+        
+        Returns:
+            Dict of ZIP code -> Forecast (missing ZIPs are treated as unknown)
+        """
+
+
+class StaticForecastProvider(ForecastProvider):
+    """Local stand-in that serves fixed forecasts, the same for every day (for tests and offline use)."""
+    
+    def __init__(self, forecasts: Dict[str, Tuple[float, float]], default: Optional[Tuple[float, float]] = None):
+        self.forecasts = forecasts
+        self.default = default
+        self.calls: List[List[str]] = []  # each fetch() batch, for inspection
+        self.days: List[date] = []  # the day each batch was for
+    
+    def fetch(self, zip_codes: List[str], day: date) -> Dict[str, Forecast]:
+        self.calls.append(list(zip_codes))
+        self.days.append(day)
+        result = {}
+        for zip_code in zip_codes:
+            temps = self.forecasts.get(zip_code, self.default)
+            if temps is not None:
+                result[zip_code] = Forecast(zip_code, low_f=temps[0], high_f=temps[1], day=day)
+        return result
+    
+    @classmethod
+    def from_file(cls, path: str) -> "StaticForecastProvider":
+        """Load forecasts from a JSON file of {"ZIP": [low_f, high_f]} ("*" = default)."""
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        default = data.pop("*", None)
+        return cls(
+            {zip_code: tuple(temps) for zip_code, temps in data.items()},
+            default=tuple(default) if default else None
+        )
+
+
+class OpenMeteoForecastProvider(ForecastProvider):
+    """
+    Live forecasts from Open-Meteo (no API key needed).
+    
+    ZIP codes are geocoded once through Zippopotam.us and remembered; the
+    forecasts for a whole batch then come from a single Open-Meteo request.
+    """
+    
+    GEOCODE_URL = "https://api.zippopotam.us/us/{zip_code}"
+    FORECAST_URL = "https://api.open-meteo.com/v1/forecast"
+    
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+        self._coordinates: Dict[str, Tuple[float, float]] = {}
+    
+    def fetch(self, zip_codes: List[str], day: date) -> Dict[str, Forecast]:
+        located = [zip_code for zip_code in zip_codes if self._locate(zip_code)]
+        if not located:
+            return {}
+        
+        response = requests.get(self.FORECAST_URL, params={
+            "latitude": ",".join(str(self._coordinates[z][0]) for z in located),
+            "longitude": ",".join(str(self._coordinates[z][1]) for z in located),
+            "daily": "temperature_2m_min,temperature_2m_max",
+            "temperature_unit": "fahrenheit",
+            "start_date": day.isoformat(),
+            "end_date": day.isoformat(),
+            "timezone": "auto",
+        }, timeout=self.timeout)
+        response.raise_for_status()
+        data = response.json()
+        locations = data if isinstance(data, list) else [data]  # one location comes back unwrapped
+        
+        result = {}
+        for zip_code, location in zip(located, locations):
+            daily = location["daily"]
+            result[zip_code] = Forecast(
+                zip_code,
+                low_f=daily["temperature_2m_min"][0],
+                high_f=daily["temperature_2m_max"][0],
+                day=day
+            )
+        return result
+    
+    def _locate(self, zip_code: str) -> bool:
+        """Look up (and remember) a ZIP's coordinates. Returns False if unknown."""
+        if zip_code in self._coordinates:
+            return True
+        try:
+            response = requests.get(self.GEOCODE_URL.format(zip_code=zip_code), timeout=self.timeout)
+            if response.status_code != 200:
+                return False
+            place = response.json()["places"][0]
+            self._coordinates[zip_code] = (float(place["latitude"]), float(place["longitude"]))
+            return True
+        except (requests.RequestException, KeyError, IndexError, ValueError) as e:
+            print(f"Error geocoding ZIP {zip_code}: {e}")
+            return False
+
+
+def evaluate(forecast: Forecast, ship_date: date) -> ShippingDecision:
+    """Apply the shipping rules for a ship date to the forecast for its delivery date."""
+    if ship_date.weekday() not in SHIP_WEEKDAYS:
+        return ShippingDecision(False, False, "Live animals ship Monday-Wednesday only", forecast)
+    if forecast.low_f < BLOCK_BELOW_F:
+        return ShippingDecision(False, False, f"Too cold to ship ({forecast.low_f:.0f}°F)", forecast)
+    if forecast.high_f > BLOCK_ABOVE_F:
+        return ShippingDecision(False, False, f"Too hot to ship ({forecast.high_f:.0f}°F)", forecast)
+    if forecast.low_f < HOLD_BELOW_F:
+        return ShippingDecision(True, True, "Hold for pickup at FedEx hub", forecast)
+    return ShippingDecision(True, False, "OK to ship", forecast)
+
+
+def delivery_date(ship_date: date) -> date:
+    """Get the day a shipment sent on ship_date arrives (the day its weather matters)."""
+    return ship_date + timedelta(days=TRANSIT_DAYS)
+
+
+def next_ship_day(today: date) -> date:
+    """Get the first allowed ship day on or after today."""
+    while today.weekday() not in SHIP_WEEKDAYS:
+        today += timedelta(days=1)
+    return today
+
+
+class ShippingGuard:
+    """Answers shipping checks from a TTL forecast cache."""
+    
+    def __init__(
+        self,
+        provider: ForecastProvider,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        batch_window: float = DEFAULT_BATCH_WINDOW,
+        region_digits: int = 5,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        """
+        Args:
+            provider: Forecast source
+            ttl_seconds: How long a forecast stays fresh
+            batch_window: Seconds to gather concurrent misses into one fetch
+            region_digits: ZIP prefix length used as the cache key (3 = ZIP3 region)
+            clock: Time source (injectable for tests)
+        """
+        self.provider = provider
+        self.ttl_seconds = ttl_seconds
+        self.batch_window = batch_window
+        self.region_digits = region_digits
+        self.clock = clock
+        
+        self._lock = threading.Lock()
+        # Keyed by (region, forecast date)
+        self._cache: Dict[Tuple[str, date], Tuple[float, Forecast]] = {}  # -> (fetched_at, forecast)
+        self._inflight: Dict[Tuple[str, date], Future] = {}  # -> pending lookup
+        self._pending: Dict[Tuple[str, date], str] = {}  # -> ZIP for the batch being gathered
+    
+    def check(self, zip_code: str, ship_date: Optional[date] = None) -> ShippingDecision:
+        """Check whether a live animal can ship to a ZIP code."""
+        return self.check_many([zip_code], ship_date)[zip_code]
+    
+    def check_many(self, zip_codes: Iterable[str], ship_date: Optional[date] = None) -> Dict[str, ShippingDecision]:
+        """Check several ZIP codes, fetching all cache misses in one batch (ship date defaults to the next ship day)."""
+        ship_date = ship_date or next_ship_day(date.today())
+        forecasts = self.get_forecasts(zip_codes, delivery_date(ship_date))
+        
+        decisions = {}
+        for zip_code, forecast in forecasts.items():
+            if forecast is None:
+                # Fail safe - no forecast means no live shipping
+                decisions[zip_code] = ShippingDecision(False, False, "Forecast unavailable")
+            else:
+                decisions[zip_code] = evaluate(forecast, ship_date)
+        return decisions
+    
+    def get_forecasts(self, zip_codes: Iterable[str], day: date) -> Dict[str, Optional[Forecast]]:
+        """Get forecasts covering a date for ZIP codes from cache, fetching only what is missing."""
+        now = self.clock()
+        result: Dict[str, Optional[Forecast]] = {}
+        waiting: Dict[str, Future] = {}
+        lead = False
+        
+        with self._lock:
+            for zip_code in zip_codes:
+                key = (self._region(zip_code), day)
+                cached = self._cache.get(key)
+                if cached and now - cached[0] < self.ttl_seconds:
+                    result[zip_code] = cached[1]
+                    continue
+                
+                future = self._inflight.get(key)
+                if future is None:
+                    # First caller to queue into an empty batch runs the fetch
+                    lead = lead or not self._pending
+                    future = Future()
+                    self._inflight[key] = future
+                    self._pending[key] = zip_code
+                waiting[zip_code] = future
+        
+        if lead:
+            if self.batch_window:
+                time.sleep(self.batch_window)
+            self._fetch_pending()
+        
+        for zip_code, future in waiting.items():
+            try:
+                result[zip_code] = future.result()
+            except Exception:
+                result[zip_code] = None
+        return result
+    
+    def clear(self) -> None:
+        """Drop all cached forecasts."""
+        with self._lock:
+            self._cache.clear()
+    
+    def _fetch_pending(self) -> None:
+        """Fetch the gathered batch with one provider call per date and resolve waiters."""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        batches: Dict[date, Dict[str, str]] = {}
+        for (region, day), zip_code in pending.items():
+            batches.setdefault(day, {})[region] = zip_code
+        
+        for day, batch in sorted(batches.items()):
+            try:
+                forecasts = self.provider.fetch(list(batch.values()), day)
+            except Exception as e:
+                print(f"Error fetching forecasts: {e}")
+                with self._lock:
+                    futures = [self._inflight.pop((region, day)) for region in batch]
+                for future in futures:
+                    future.set_exception(e)
+                continue
+            
+            now = self.clock()
+            with self._lock:
+                # Expired entries would pile up across dates - drop them
+                for key in [key for key, (fetched_at, _) in self._cache.items() if now - fetched_at >= self.ttl_seconds]:
+                    del self._cache[key]
+                futures = []
+                for region, zip_code in batch.items():
+                    forecast = forecasts.get(zip_code)
+                    if forecast is not None:
+                        self._cache[(region, day)] = (now, forecast)
+                    futures.append((self._inflight.pop((region, day)), forecast))
+            for future, forecast in futures:
+                future.set_result(forecast)
+    
+    def _region(self, zip_code: str) -> str:
+        """Cache key for a ZIP code."""
+        return zip_code.strip()[:self.region_digits]
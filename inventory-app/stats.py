@@ -0,0 +1,102 @@
+"""
+Inventory Statistics - Running Totals for the Dashboard
+
+Totals are kept per (category, status) bucket and adjusted by each
+Storage change event, so a change costs O(1) and reading the dashboard
+never scans the items. A full recompute happens only on load.
+"""
+import json
+from typing import Dict, Optional, Tuple
+
+from models import InventoryItem
+from storage import Storage
+
+
+STATUSES = ["available", "reserved", "sold"]
+
+
+class Bucket:
+    """Running totals for one (category, status) pair."""
+    __slots__ = ("items", "units", "value_cents", "out_of_stock")
+    
+    def __init__(self):
+        self.items = 0
+        self.units = 0
+        self.value_cents = 0  # integer cents avoid float drift over many updates
+        self.out_of_stock = 0
+
+
+class InventoryStats:
+    """Aggregates kept in sync with a Storage through its listener hook."""
+    
+    def __init__(self, storage: Storage):
+        self.storage = storage
+        self._buckets: Dict[Tuple[str, str], Bucket] = {}
+        storage.add_listener(self._on_change)
+    
+    def summary(self, category: Optional[str] = None) -> dict:
+        """
+        Get totals for one category, or for the whole inventory.
+        
+        Returns:
+            Dict with items, units_in_stock, inventory_value, out_of_stock
+            and a per-status item count
+        """
+        result = {
+            "items": 0,
+            "units_in_stock": 0,
+            "inventory_value": 0.0,
+            "out_of_stock": 0,
+            "by_status": {status: 0 for status in STATUSES},
+        }
+        value_cents = 0
+        for (cat, status), bucket in self._buckets.items():
+            if category is not None and cat != category:
+                continue
+            result["items"] += bucket.items
+            result["by_status"][status] = result["by_status"].get(status, 0) + bucket.items
+            # Sold/reserved stock isn't sellable, so only available items count
+            if status == "available":
+                result["units_in_stock"] += bucket.units
+                value_cents += bucket.value_cents
+                result["out_of_stock"] += bucket.out_of_stock
+        result["inventory_value"] = value_cents / 100
+        return result
+    
+    def to_dict(self) -> dict:
+        """Get overall and per-category totals."""
+        categories = sorted({cat for cat, _ in self._buckets})
+        return {
+            "totals": self.summary(),
+            "categories": {cat: self.summary(cat) for cat in categories},
+        }
+    
+    def to_json(self) -> str:
+        """Get statistics as a JSON string for publishing."""
+        return json.dumps(self.to_dict(), indent=2)
+    
+    def _on_change(self, event: str, before: Optional[InventoryItem], after: Optional[InventoryItem]) -> None:
+        """Storage listener - back out the old item, add the new one."""
+        if event == "load":
+            self._buckets = {}
+            for item in self.storage.items:
+                self._apply(item, 1)
+            return
+        if before is not None:
+            self._apply(before, -1)
+        if after is not None:
+            self._apply(after, 1)
+    
+    def _apply(self, item: InventoryItem, sign: int) -> None:
+        """Add (sign=1) or remove (sign=-1) an item's contribution."""
+        key = (item.category, item.status)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = Bucket()
+        
+        units = max(item.quantity, 0)
+        bucket.items += sign
+        bucket.units += sign * units
+        bucket.value_cents += sign * round(item.price * 100) * units
+        if item.quantity <= 0:
+            bucket.out_of_stock += sign
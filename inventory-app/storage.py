@@ -1,21 +1,56 @@
 """
 Local JSON Storage for Inventory
 """
+import dataclasses
 import json
 import os
-from typing import List, Optional
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional, Tuple
 from models import InventoryItem
 
 
+# History operations are stored as (kind, index, before, after) tuples.
+# "before" is the item that was there prior to the change (None for adds)
+# and "after" the item left in place (None for deletes), so undo and redo
+# are each a single list insert/delete/assignment - no snapshot copies.
+# Each undo step is a list of operations so a batch undoes as one unit.
+Operation = Tuple[str, int, Optional[InventoryItem], Optional[InventoryItem]]
+
+# Change listeners are called as listener(event, before, after) where event is
+# "add", "update", "delete" or "load" (before/after are None for "load").
+Listener = Callable[[str, Optional[InventoryItem], Optional[InventoryItem]], None]
+
+
 class Storage:
     """Handles reading/writing inventory data to local JSON file."""
     
-    def __init__(self, filepath: Optional[str] = None):
+    def __init__(self, filepath: Optional[str] = None, history_limit: int = 100):
         if filepath is None:
             # Default to the same directory as storage.py
             filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "inventory.json")
         self.filepath = filepath
         self.items: List[InventoryItem] = []
+        
+        # Guards items/history when mutated from worker threads (e.g. checkouts)
+        self._lock = threading.RLock()
+        
+        # Undo/redo history (bounded - oldest entries fall off)
+        self._undo_stack: deque = deque(maxlen=history_limit)
+        self._redo_stack: deque = deque(maxlen=history_limit)
+        
+        # Operations collected while inside batch() (None when not batching)
+        self._batch: Optional[List[Operation]] = None
+        
+        # Indexes/aggregates kept in step with every change
+        self._listeners: List[Listener] = []
+        
+        # Saves are numbered so a slow background write never overwrites a newer one
+        self._write_lock = threading.Lock()
+        self._save_generation = 0
+        self._written_generation = 0
+        
         self.load()
     
     def load(self) -> None:
@@ -30,12 +65,45 @@ class Storage:
                 self.items = []
         else:
             self.items = []
+        
+        # History refers to list positions, so it is meaningless after a reload
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        self._notify("load", None, None)
     
     def save(self) -> None:
         """Save inventory to JSON file."""
-        data = [item.to_dict() for item in self.items]
-        with open(self.filepath, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        self._write(*self._snapshot())
+    
+    def save_in_background(self) -> threading.Thread:
+        """
+        Save inventory on a worker thread and return straight away.
+        
+        Items are replaced rather than mutated, so a shallow copy of the list
+        is a consistent snapshot. The thread is not a daemon, so the write
+        still completes if the app is closed right after.
+        """
+        thread = threading.Thread(target=self._write, args=self._snapshot())
+        thread.start()
+        return thread
+    
+    def _snapshot(self) -> Tuple[List[InventoryItem], int]:
+        """Copy the item list and number the save it belongs to."""
+        with self._lock:
+            self._save_generation += 1
+            return list(self.items), self._save_generation
+    
+    def _write(self, items: List[InventoryItem], generation: int) -> None:
+        """Write a snapshot to disk unless a newer one has been written already."""
+        with self._write_lock:
+            if generation < self._written_generation:
+                return
+            data = [item.to_dict() for item in items]
+            # One write of the encoded string is quicker than json.dump's many small ones
+            content = json.dumps(data, indent=2, ensure_ascii=False)
+            with open(self.filepath, "w", encoding="utf-8") as f:
+                f.write(content)
+            self._written_generation = generation
     
     def get_all(self) -> List[InventoryItem]:
         """Get all items."""
@@ -54,28 +122,181 @@ class Storage:
     
     def add(self, item: InventoryItem) -> None:
         """Add a new item."""
-        self.items.append(item)
-        self.save()
+        with self._lock:
+            self._record(("add", len(self.items), None, item))
+            self.items.append(item)
+            self._notify("add", None, item)
+            self._commit()
     
     def update(self, item_id: str, updated_item: InventoryItem) -> bool:
         """Update an existing item."""
-        for i, item in enumerate(self.items):
-            if item.id == item_id:
-                self.items[i] = updated_item
-                self.save()
-                return True
-        return False
+        with self._lock:
+            for i, item in enumerate(self.items):
+                if item.id == item_id:
+                    self._record(("update", i, item, updated_item))
+                    self.items[i] = updated_item
+                    self._notify("update", item, updated_item)
+                    self._commit()
+                    return True
+            return False
     
     def delete(self, item_id: str) -> bool:
         """Delete an item by ID."""
+        with self._lock:
+            for i, item in enumerate(self.items):
+                if item.id == item_id:
+                    self._record(("delete", i, item, None))
+                    del self.items[i]
+                    self._notify("delete", item, None)
+                    self._commit()
+                    return True
+            return False
+    
+    def compare_and_set(
+        self,
+        item_id: str,
+        expected: Dict[str, Any],
+        changes: Dict[str, Any],
+        save: bool = True
+    ) -> bool:
+        """
+        Atomically update fields of an item if its current values match.
+        
+        Args:
+            item_id: ID of the item to change
+            expected: Field values the item must still have (e.g. {"quantity": 3})
+            changes: Field values to set when the check passes
+            save: Write the file now; pass False when the caller saves
+                several changes at once (group commit)
+        
+        Returns:
+            True if the item was updated, False if it is missing or changed
+        """
+        with self._lock:
+            for i, item in enumerate(self.items):
+                if item.id == item_id:
+                    if any(getattr(item, key) != value for key, value in expected.items()):
+                        return False
+                    updated_item = dataclasses.replace(item, **changes)
+                    self._record(("update", i, item, updated_item))
+                    self.items[i] = updated_item
+                    self._notify("update", item, updated_item)
+                    if save:
+                        self._commit()
+                    return True
+            return False
+    
+    @contextmanager
+    def batch(self):
+        """
+        Group several changes into a single save and a single undo step.
+        
+        Usage:
+            with storage.batch():
+                storage.update(...)
+                storage.update(...)
+        """
+        with self._lock:
+            if self._batch is not None:
+                # Nested batch - the outermost one commits
+                yield self
+                return
+            
+            self._batch = []
+            try:
+                yield self
+            finally:
+                ops, self._batch = self._batch, None
+                if ops:
+                    self._undo_stack.append(ops)
+                    self._redo_stack.clear()
+                    self.save()
+    
+    def add_listener(self, listener: Listener) -> None:
+        """Register a change listener (it is sent "load" straight away)."""
+        self._listeners.append(listener)
+        listener("load", None, None)
+    
+    def _notify(self, event: str, before: Optional[InventoryItem], after: Optional[InventoryItem]) -> None:
+        """Tell listeners about a change."""
+        for listener in self._listeners:
+            listener(event, before, after)
+    
+    # === Undo / Redo ===
+    
+    def can_undo(self) -> bool:
+        """Check if there is an operation to undo."""
+        return bool(self._undo_stack)
+    
+    def can_redo(self) -> bool:
+        """Check if there is an undone operation to redo."""
+        return bool(self._redo_stack)
+    
+    def undo(self) -> bool:
+        """Revert the most recent add/update/delete."""
+        with self._lock:
+            if not self._undo_stack:
+                return False
+            ops = self._undo_stack.pop()
+            for op in reversed(ops):
+                self._apply(op, reverse=True)
+            self._redo_stack.append(ops)
+            # Serialising a large inventory takes a noticeable fraction of a
+            # second, so write it off the UI thread to keep undo instant
+            self.save_in_background()
+            return True
+    
+    def redo(self) -> bool:
+        """Re-apply the most recently undone operation."""
+        with self._lock:
+            if not self._redo_stack:
+                return False
+            ops = self._redo_stack.pop()
+            for op in ops:
+                self._apply(op, reverse=False)
+            self._undo_stack.append(ops)
+            self.save_in_background()
+            return True
+    
+    def _record(self, op: Operation) -> None:
+        """Push an operation onto the undo stack (a new edit clears redo)."""
+        if self._batch is not None:
+            self._batch.append(op)
+            return
+        self._undo_stack.append([op])
+        self._redo_stack.clear()
+    
+    def _commit(self) -> None:
+        """Save after a change, unless a batch will save once at the end."""
+        if self._batch is None:
+            self.save()
+    
+    def _apply(self, op: Operation, reverse: bool) -> None:
+        """Apply an operation forwards (redo) or its inverse (undo)."""
+        kind, index, before, after = op
+        if reverse:
+            kind = {"add": "delete", "delete": "add", "update": "update"}[kind]
+            before, after = after, before
+        
+        if kind == "add":
+            self.items.insert(min(index, len(self.items)), after)
+        elif kind == "delete":
+            del self.items[self._locate(index, before.id)]
+        else:
+            self.items[self._locate(index, before.id)] = after
+        self._notify(kind, before, after)
+    
+    def _locate(self, index: int, item_id: str) -> int:
+        """Find an item's position, trusting the recorded index if it still matches."""
+        if index < len(self.items) and self.items[index].id == item_id:
+            return index
         for i, item in enumerate(self.items):
             if item.id == item_id:
-                del self.items[i]
-                self.save()
-                return True
-        return False
+                return i
+        raise KeyError(item_id)
     
     def get_json_string(self) -> str:
         """Get inventory as JSON string for publishing."""
-        data = [item.to_dict() for item in self.items]
+        with self._lock:
+            data = [item.to_dict() for item in self.items]
         return json.dumps(data, indent=2, ensure_ascii=False)
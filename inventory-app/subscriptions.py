@@ -0,0 +1,360 @@
+"""
+Subscription Engine - Feeder "Subscribe & Save" Orders
+
+Subscriptions are kept in a min-heap ordered by next ship date, so the
+Tuesday run only pops the records that are due instead of scanning every
+subscriber. Stock for a whole run is taken from the pantry in one
+Storage batch (one save, one undo step); subscriptions that can't be
+filled are reported as shortfalls and stay due for the next run.
+
+A run touches two files, so it is ordered to never ship twice: the
+advanced subscriptions are saved first, next to a run marker listing the
+run's shipments, then the pantry stock, then the marker is removed. If a
+run dies in between, the next run finds the marker and reports its
+shipments again (they were never handed back) rather than re-filling them.
+
+Usage:
+    python subscriptions.py run [--date YYYY-MM-DD]
+    python subscriptions.py bench [--count 100000]
+"""
+import argparse
+import calendar
+import dataclasses
+import heapq
+import json
+import os
+import random
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from models import InventoryItem
+from storage import Storage
+
+
+FREQUENCIES = ["weekly", "biweekly", "monthly"]
+SUBSCRIPTION_DISCOUNT = 0.10  # 10% off every subscription order
+PROCESSING_WEEKDAY = 1  # Tuesday (Monday == 0)
+
+
+class Subscription:
+    """A recurring order. Slotted so 100k+ records stay compact in memory."""
+    __slots__ = ("id", "email", "item_id", "quantity", "frequency", "next_ship")
+    
+    def __init__(self, id: str, email: str, item_id: str, quantity: int, frequency: str, next_ship: date):
+        self.id = id
+        self.email = email
+        self.item_id = item_id
+        self.quantity = quantity
+        self.frequency = frequency
+        self.next_ship = next_ship
+    
+    def to_row(self) -> list:
+        """Convert to a compact JSON row."""
+        return [self.id, self.email, self.item_id, self.quantity, self.frequency, self.next_ship.isoformat()]
+    
+    @classmethod
+    def from_row(cls, row: list) -> "Subscription":
+        """Create from a compact JSON row."""
+        sub_id, email, item_id, quantity, frequency, next_ship = row
+        return cls(sub_id, email, item_id, quantity, frequency, date.fromisoformat(next_ship))
+
+
+@dataclass
+class Shipment:
+    """One subscription order filled by a processing run."""
+    subscription_id: str
+    email: str
+    item_id: str
+    quantity: int
+    unit_price: float  # after subscription discount
+
+
+@dataclass
+class Shortfall:
+    """A due subscription that could not be filled."""
+    subscription_id: str
+    email: str
+    item_id: str
+    requested: int
+    available: int
+
+
+def advance(ship_date: date, frequency: str) -> date:
+    """Get the ship date one period after ship_date."""
+    if frequency == "weekly":
+        return ship_date + timedelta(days=7)
+    if frequency == "biweekly":
+        return ship_date + timedelta(days=14)
+    
+    # Monthly - same day next month, clamped to the month's length
+    year = ship_date.year + ship_date.month // 12
+    month = ship_date.month % 12 + 1
+    day = min(ship_date.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day)
+
+
+def next_processing_date(today: date) -> date:
+    """Get the next Tuesday on or after today."""
+    return today + timedelta(days=(PROCESSING_WEEKDAY - today.weekday()) % 7)
+
+
+class SubscriptionEngine:
+    """Stores subscriptions and processes the ones that are due."""
+    
+    def __init__(self, storage: Storage, filepath: Optional[str] = None):
+        if filepath is None:
+            filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)), "subscriptions.json")
+        self.filepath = filepath
+        self.run_path = os.path.splitext(filepath)[0] + "_run.json"
+        self.storage = storage
+        self.subscriptions: Dict[str, Subscription] = {}
+        
+        # Entries are (ship ordinal, subscription id). Skips and cancels leave
+        # stale entries behind; they are discarded when popped.
+        self._queue: List[Tuple[int, str]] = []
+        
+        self.load()
+    
+    def load(self) -> None:
+        """Load subscriptions from JSON file."""
+        self.subscriptions = {}
+        if os.path.exists(self.filepath):
+            try:
+                with open(self.filepath, "r", encoding="utf-8") as f:
+                    for row in json.load(f):
+                        sub = Subscription.from_row(row)
+                        self.subscriptions[sub.id] = sub
+            except (json.JSONDecodeError, ValueError) as e:
+                print(f"Error loading subscriptions: {e}")
+                self.subscriptions = {}
+        
+        self._queue = [(sub.next_ship.toordinal(), sub.id) for sub in self.subscriptions.values()]
+        heapq.heapify(self._queue)
+    
+    def save(self) -> None:
+        """Save subscriptions to JSON file."""
+        self._write_json(self.filepath, [sub.to_row() for sub in self.subscriptions.values()])
+    
+    @staticmethod
+    def _write_json(path: str, data) -> None:
+        """Write a JSON file atomically (a crash leaves the old version, never half a file)."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    
+    def subscribe(
+        self,
+        email: str,
+        item_id: str,
+        quantity: int,
+        frequency: str,
+        first_ship: Optional[date] = None,
+        autosave: bool = True
+    ) -> Subscription:
+        """Create a new subscription (first ship defaults to the next run)."""
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Unknown frequency: {frequency}")
+        
+        sub = Subscription(
+            id=uuid.uuid4().hex[:12],
+            email=email,
+            item_id=item_id,
+            quantity=quantity,
+            frequency=frequency,
+            next_ship=first_ship or next_processing_date(date.today())
+        )
+        self.subscriptions[sub.id] = sub
+        heapq.heappush(self._queue, (sub.next_ship.toordinal(), sub.id))
+        if autosave:
+            self.save()
+        return sub
+    
+    def skip(self, subscription_id: str) -> bool:
+        """Skip the next shipment of a subscription."""
+        sub = self.subscriptions.get(subscription_id)
+        if sub is None:
+            return False
+        sub.next_ship = advance(sub.next_ship, sub.frequency)
+        heapq.heappush(self._queue, (sub.next_ship.toordinal(), sub.id))
+        self.save()
+        return True
+    
+    def cancel(self, subscription_id: str) -> bool:
+        """Cancel a subscription."""
+        if self.subscriptions.pop(subscription_id, None) is None:
+            return False
+        self.save()
+        return True
+    
+    def process(self, run_date: Optional[date] = None) -> Tuple[List[Shipment], List[Shortfall]]:
+        """
+        Fill every subscription due up to a week after run_date.
+        
+        Shipments of an earlier run that was interrupted before returning
+        are listed first.
+        
+        Args:
+            run_date: Processing date (defaults to today)
+        
+        Returns:
+            Tuple of (shipments, shortfalls)
+        """
+        run_date = run_date or date.today()
+        cutoff = (run_date + timedelta(days=6)).toordinal()
+        recovered = self._recover_interrupted_run()
+        
+        # Pop only what is due; stale heap entries are dropped on the way
+        due: List[Subscription] = []
+        while self._queue and self._queue[0][0] <= cutoff:
+            ordinal, sub_id = heapq.heappop(self._queue)
+            sub = self.subscriptions.get(sub_id)
+            if sub is not None and sub.next_ship.toordinal() == ordinal:
+                due.append(sub)
+        
+        # Allocate stock in due-date order against a running tally
+        remaining: Dict[str, int] = {}
+        items: Dict[str, Optional[InventoryItem]] = {}
+        shipments: List[Shipment] = []
+        shortfalls: List[Shortfall] = []
+        
+        # Stock is read and written back under the storage lock (batch()
+        # holds it), so a checkout or UI edit can't land in between and be
+        # overwritten by a stale quantity. One batched commit for the run.
+        with self.storage.batch():
+            for sub in due:
+                if sub.item_id not in items:
+                    item = self.storage.get_by_id(sub.item_id)
+                    items[sub.item_id] = item
+                    in_stock = item is not None and item.status == "available"
+                    remaining[sub.item_id] = item.quantity if in_stock else 0
+                
+                item = items[sub.item_id]
+                if remaining[sub.item_id] < sub.quantity:
+                    shortfalls.append(Shortfall(sub.id, sub.email, sub.item_id, sub.quantity, remaining[sub.item_id]))
+                    heapq.heappush(self._queue, (sub.next_ship.toordinal(), sub.id))
+                    continue
+                
+                remaining[sub.item_id] -= sub.quantity
+                unit_price = round(item.price * (1 - SUBSCRIPTION_DISCOUNT), 2)
+                shipments.append(Shipment(sub.id, sub.email, sub.item_id, sub.quantity, unit_price))
+                
+                while sub.next_ship.toordinal() <= cutoff:
+                    sub.next_ship = advance(sub.next_ship, sub.frequency)
+                heapq.heappush(self._queue, (sub.next_ship.toordinal(), sub.id))
+            
+            # Subscriptions go to disk before the stock (committed when the
+            # batch exits), so a crash in between can't ship this run twice
+            if due:
+                self._write_json(self.run_path, {
+                    "run_date": run_date.isoformat(),
+                    "shipments": [dataclasses.astuple(s) for s in shipments],
+                })
+                self.save()
+            
+            for item_id, item in items.items():
+                if item is not None and remaining[item_id] != item.quantity:
+                    self.storage.update(item_id, dataclasses.replace(item, quantity=remaining[item_id]))
+        
+        if due:
+            os.remove(self.run_path)
+        return recovered + shipments, shortfalls
+    
+    def _recover_interrupted_run(self) -> List[Shipment]:
+        """Get the shipments of a run that died before finishing (its marker is still on disk)."""
+        if not os.path.exists(self.run_path):
+            return []
+        try:
+            with open(self.run_path, "r", encoding="utf-8") as f:
+                marker = json.load(f)
+            shipments = [Shipment(*row) for row in marker["shipments"]]
+        except (json.JSONDecodeError, OSError, KeyError, TypeError) as e:
+            print(f"Error reading interrupted subscription run: {e}")
+            return []
+        
+        print(
+            f"Subscription run of {marker.get('run_date')} was interrupted: re-listing "
+            f"{len(shipments)} shipments - check their pantry stock was taken"
+        )
+        os.remove(self.run_path)
+        return shipments
+
+
+def run_benchmark(count: int = 100000) -> dict:
+    """Process `count` subscriptions against a scratch pantry and time it."""
+    tmp_dir = tempfile.mkdtemp(prefix="cbh-subs-")
+    storage = Storage(os.path.join(tmp_dir, "inventory.json"))
+    with storage.batch():
+        for i in range(20):
+            storage.add(InventoryItem(
+                id=InventoryItem.generate_id("pantry"),
+                category="pantry",
+                name=f"Feeder {i}",
+                variant="Medium",
+                price=12.50,
+                quantity=count // 4,
+                image=""
+            ))
+    
+    engine = SubscriptionEngine(storage, os.path.join(tmp_dir, "subscriptions.json"))
+    run_date = next_processing_date(date.today())
+    rng = random.Random(42)
+    item_ids = [item.id for item in storage.items]
+    
+    started = time.perf_counter()
+    for i in range(count):
+        engine.subscribe(
+            email=f"customer{i}@example.com",
+            item_id=rng.choice(item_ids),
+            quantity=rng.randint(1, 3),
+            frequency=rng.choice(FREQUENCIES),
+            first_ship=run_date + timedelta(days=rng.randint(0, 27)),
+            autosave=False
+        )
+    engine.save()
+    created = time.perf_counter() - started
+    
+    started = time.perf_counter()
+    shipments, shortfalls = engine.process(run_date)
+    processed = time.perf_counter() - started
+    
+    return {
+        "subscriptions": count,
+        "create_seconds": round(created, 2),
+        "process_seconds": round(processed, 2),
+        "shipped": len(shipments),
+        "shortfalls": len(shortfalls),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Subscribe & Save processing")
+    sub = parser.add_subparsers(dest="command", required=True)
+    
+    run = sub.add_parser("run", help="Process subscriptions due this week")
+    run.add_argument("--date", help="Processing date (YYYY-MM-DD, default today)")
+    
+    bench = sub.add_parser("bench", help="Time a run over generated subscriptions")
+    bench.add_argument("--count", type=int, default=100000)
+    
+    args = parser.parse_args()
+    
+    if args.command == "run":
+        run_date = date.fromisoformat(args.date) if args.date else date.today()
+        engine = SubscriptionEngine(Storage())
+        shipments, shortfalls = engine.process(run_date)
+        print(f"Shipped {len(shipments)} subscription orders")
+        for s in shortfalls:
+            print(f"SHORTFALL {s.subscription_id} ({s.email}): {s.item_id} needs {s.requested}, {s.available} left")
+    else:
+        print(json.dumps(run_benchmark(args.count), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""
+Test setup - the app modules are flat files in inventory-app/, imported by name.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeClock:
+    """Manually advanced time source for code that takes a `clock` callable."""
+    
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    """A FakeClock starting at t=1000."""
+    return FakeClock()
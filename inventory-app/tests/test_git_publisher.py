@@ -0,0 +1,154 @@
+"""
+Tests for the git plumbing publisher against a local bare repository.
+"""
+import subprocess
+
+import pytest
+
+from git_publisher import GitPublisher, remote_host
+
+
+def git(cwd, *args):
+    return subprocess.run(["git", *args], cwd=cwd, check=True, capture_output=True, text=True).stdout.strip()
+
+
+@pytest.fixture(autouse=True)
+def git_identity(monkeypatch):
+    for var, value in [
+        ("GIT_AUTHOR_NAME", "Test"), ("GIT_AUTHOR_EMAIL", "test@example.com"),
+        ("GIT_COMMITTER_NAME", "Test"), ("GIT_COMMITTER_EMAIL", "test@example.com"),
+    ]:
+        monkeypatch.setenv(var, value)
+
+
+@pytest.fixture
+def site(tmp_path):
+    """A bare "GitHub" repo with one commit, plus a clone for the publisher."""
+    bare = tmp_path / "site.git"
+    seed = tmp_path / "seed"
+    git(tmp_path, "init", "--quiet", "--bare", "-b", "main", str(bare))
+    git(tmp_path, "clone", "--quiet", str(bare), str(seed))
+    (seed / "docs").mkdir()
+    (seed / "docs" / "index.html").write_text("<html></html>")
+    git(seed, "add", ".")
+    git(seed, "commit", "--quiet", "-m", "Initial site")
+    git(seed, "push", "--quiet", "origin", "HEAD:main")
+    
+    clone = tmp_path / "clone"
+    git(tmp_path, "clone", "--quiet", str(bare), str(clone))
+    publisher = GitPublisher(config={"git_clone_path": str(clone), "github_branch": "main"})
+    return bare, seed, clone, publisher
+
+
+def remote_file(bare, path):
+    return git(bare, "show", f"main:{path}")
+
+
+def test_publish_files_makes_one_commit(site):
+    bare, _, _, publisher = site
+    before = git(bare, "rev-parse", "main")
+    
+    success, message = publisher.publish_files(
+        {"docs/inventory.json": b"[]", "docs/stats.json": b"{}"},
+        "Update inventory"
+    )
+    
+    assert success, message
+    assert git(bare, "rev-parse", "main~1") == before
+    assert remote_file(bare, "docs/inventory.json") == "[]"
+    assert remote_file(bare, "docs/stats.json") == "{}"
+    assert remote_file(bare, "docs/index.html") == "<html></html>"  # rest of the tree kept
+
+
+def test_unchanged_content_makes_no_commit(site):
+    bare, _, _, publisher = site
+    publisher.publish_file("docs/inventory.json", "[]")
+    head = git(bare, "rev-parse", "main")
+    
+    success, message = publisher.publish_file("docs/inventory.json", "[]")
+    
+    assert success
+    assert message == "No changes to publish"
+    assert git(bare, "rev-parse", "main") == head
+
+
+def test_only_changed_files_are_committed(site):
+    bare, _, _, publisher = site
+    publisher.publish_files({"docs/a.json": b"1", "docs/b.json": b"1"}, "First")
+    
+    publisher.publish_files({"docs/a.json": b"1", "docs/b.json": b"2"}, "Second")
+    
+    assert git(bare, "diff", "--name-only", "main~1", "main") == "docs/b.json"
+
+
+def test_working_tree_is_untouched(site):
+    _, _, clone, publisher = site
+    head = git(clone, "rev-parse", "HEAD")
+    
+    publisher.publish_file("docs/inventory.json", "[]")
+    
+    assert git(clone, "rev-parse", "HEAD") == head
+    assert git(clone, "status", "--porcelain") == ""
+    assert not (clone / "docs" / "inventory.json").exists()
+
+
+def test_stale_parent_is_rejected_then_recovers(site, monkeypatch):
+    bare, seed, _, publisher = site
+    publisher.publish_file("docs/inventory.json", "[1]")
+    
+    # Someone else pushes, and our fetch fails (e.g. offline for a moment)
+    (seed / "docs" / "index.html").write_text("<html>new</html>")
+    git(seed, "pull", "--quiet", "origin", "main")
+    git(seed, "commit", "--quiet", "-am", "Edit page")
+    git(seed, "push", "--quiet", "origin", "HEAD:main")
+    their_head = git(bare, "rev-parse", "main")
+    
+    real_git = publisher._git
+    monkeypatch.setattr(publisher, "_git", lambda *args, **kwargs: "" if args[0] == "fetch" else real_git(*args, **kwargs))
+    success, message = publisher.publish_file("docs/inventory.json", "[2]")
+    
+    assert not success
+    assert message.startswith("Git error")
+    assert git(bare, "rev-parse", "main") == their_head  # nothing overwritten
+    
+    monkeypatch.setattr(publisher, "_git", real_git)
+    success, message = publisher.publish_file("docs/inventory.json", "[2]")
+    
+    assert success, message
+    assert git(bare, "rev-parse", "main~1") == their_head
+    assert remote_file(bare, "docs/index.html") == "<html>new</html>"
+    assert remote_file(bare, "docs/inventory.json") == "[2]"
+
+
+def test_publish_image(site, tmp_path):
+    bare, _, _, publisher = site
+    image = tmp_path / "gecko.jpg"
+    image.write_bytes(b"\xff\xd8\xff binary")
+    
+    success, _ = publisher.publish_image(str(image), "docs/Assets/gecko.jpg")
+    
+    assert success
+    assert git(bare, "log", "-1", "--format=%s", "main") == "Add image: gecko.jpg"
+    assert publisher.publish_image(str(tmp_path / "missing.jpg"), "docs/Assets/x.jpg")[0] is False
+
+
+def test_not_configured(tmp_path):
+    publisher = GitPublisher(config={"git_clone_path": str(tmp_path / "missing")})
+    assert not publisher.is_configured()
+    assert publisher.publish_file("docs/inventory.json", "[]")[0] is False
+
+
+def test_local_remote_is_reachable(site):
+    assert site[3].is_reachable()
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://github.com/owner/site.git", ("github.com", 443)),
+    ("git@github.com:owner/site.git", ("github.com", 22)),
+    ("ssh://git@example.com:2222/site.git", ("example.com", 2222)),
+    ("/srv/git/site.git", (None, 0)),
+    ("file:///srv/git/site.git", (None, 0)),
+    ("C:/repos/site.git", (None, 0)),
+])
+def test_remote_host(url, expected):
+    assert remote_host(url) == expected
@@ -0,0 +1,101 @@
+"""
+Tests for the sorted inventory indexes, checked against a brute-force filter-and-sort.
+"""
+import dataclasses
+import random
+
+import pytest
+
+from indexes import INDEXED_FIELDS, InventoryIndex
+from models import InventoryItem
+from storage import Storage
+
+
+CATEGORIES = ["animals", "pantry", "supplies"]
+SORTS = [None, "price", "quantity", "status", "created"]
+
+
+def brute_force(storage, category, sort, descending, min_price, max_price, in_stock):
+    items = [
+        item for item in storage.items
+        if item.category == category
+        and not (in_stock and item.quantity <= 0)
+        and (min_price is None or item.price >= min_price)
+        and (max_price is None or item.price <= max_price)
+    ]
+    if sort is not None:
+        key = INDEXED_FIELDS[sort]
+        items.sort(key=lambda item: (key(item), item.id), reverse=descending)
+    return items
+
+
+def random_item(rng, n):
+    day = rng.randint(1, 28)
+    return InventoryItem(
+        id=f"PT-2026-{rng.randint(1, 12):02d}-{day:02d}-{n:04X}",
+        category=rng.choice(CATEGORIES),
+        name=f"Item {n}",
+        variant="",
+        price=float(rng.choice([5, 25, 99.5, 250, 499, 500, 750])),
+        quantity=rng.choice([0, 0, 1, 3, 10]),
+        image="",
+        status=rng.choice(["available", "available", "reserved", "sold"])
+    )
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return Storage(str(tmp_path / "inventory.json"))
+
+
+def test_cheapest_in_stock_under_a_price(storage):
+    index = InventoryIndex(storage)
+    with storage.batch():
+        for n, (price, quantity) in enumerate([(450, 0), (120, 2), (600, 1), (80, 0), (300, 5)]):
+            storage.add(InventoryItem(
+                id=f"AN-2026-10-19-{n:04X}", category="animals", name=f"Python {n}",
+                variant="", price=price, quantity=quantity, image=""
+            ))
+    result = index.query("animals", sort="price", max_price=500, in_stock=True)
+    assert [(item.price, item.quantity) for item in result] == [(120, 2), (300, 5)]
+
+
+def test_index_matches_brute_force_after_random_edits(storage):
+    rng = random.Random(2026)
+    index = InventoryIndex(storage)
+    next_id = 0
+    
+    for step in range(300):
+        action = rng.random()
+        if action < 0.1 and storage.can_undo():
+            storage.undo()
+        elif action < 0.15 and storage.can_redo():
+            storage.redo()
+        elif action < 0.5 or not storage.items:
+            storage.add(random_item(rng, next_id))
+            next_id += 1
+        elif action < 0.85:
+            item = rng.choice(storage.items)
+            changes = rng.choice([
+                {"price": float(rng.choice([5, 250, 500, 800]))},
+                {"quantity": rng.choice([0, 1, 7])},
+                {"status": rng.choice(["available", "sold"])},
+                {"category": rng.choice(CATEGORIES)},
+            ])
+            storage.update(item.id, dataclasses.replace(item, **changes))
+        else:
+            storage.delete(rng.choice(storage.items).id)
+        
+        if step % 10:
+            continue
+        for category in CATEGORIES:
+            for sort in SORTS:
+                for descending in (False, True):
+                    for min_price, max_price in [(None, None), (None, 500), (25, 499), (250, None), (600, 100)]:
+                        for in_stock in (False, True):
+                            if sort is None and descending:
+                                continue  # storage order has no reverse option
+                            args = (category, sort, descending, min_price, max_price, in_stock)
+                            got = [item.id for item in index.query(*args)]
+                            expected = [item.id for item in brute_force(storage, *args)]
+                            assert got == expected, args
@@ -0,0 +1,102 @@
+"""
+Tests for the lead journal: replay validation, torn lines and compaction.
+"""
+import json
+
+import pytest
+
+import leads
+from leads import LeadStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "leads.jsonl")
+
+
+def lines(path):
+    with open(path, "rb") as f:
+        return f.read().splitlines()
+
+
+def test_journal_replays_adds_and_status_changes(path):
+    store = LeadStore(path)
+    lead, created = store.add("Ada", "Ada@Example.com", "Ball python?")
+    assert created
+    assert store.add("Ada", "ada@example.com ", "Again")[1] is False
+    store.set_status(lead.id, "CONVERTED")
+    
+    reloaded = LeadStore(path)
+    assert reloaded.get_by_email("ada@example.com").status == "CONVERTED"
+    assert reloaded.count_by_status() == {"NEW": 0, "CONTACTED": 0, "CONVERTED": 1, "CLOSED": 0}
+
+
+def test_bad_status_is_skipped_as_corrupt(path):
+    store = LeadStore(path)
+    lead, _ = store.add("Ada", "ada@example.com", "")
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps({"op": "status", "id": lead.id, "status": "WON"}) + "\n")
+        f.write(json.dumps({"op": "add", "lead": {"id": "x1", "email": "b@example.com", "status": "LOST"}}) + "\n")
+        f.write(json.dumps({"op": "rename", "id": lead.id}) + "\n")
+    
+    reloaded = LeadStore(path)
+    assert reloaded.get_by_id(lead.id).status == "NEW"
+    assert reloaded.get_by_id("x1") is None
+    assert sum(reloaded.count_by_status().values()) == 1
+
+
+def test_torn_tail_is_truncated(path):
+    store = LeadStore(path)
+    store.add("Ada", "ada@example.com", "")
+    with open(path, "ab") as f:
+        f.write(b'{"op": "add", "lead": {"id": "tor')
+    
+    reloaded = LeadStore(path)
+    assert len(reloaded.leads) == 1
+    assert len(lines(path)) == 1
+    reloaded.add("Bob", "bob@example.com", "")
+    assert len(LeadStore(path).leads) == 2
+
+
+def test_append_after_a_failed_one_starts_on_a_new_line(path, monkeypatch):
+    store = LeadStore(path)
+    store.add("Ada", "ada@example.com", "")
+    
+    def disk_error(*args, **kwargs):
+        raise OSError(28, "No space left on device")
+    with monkeypatch.context() as patch:
+        patch.setattr(leads.os, "makedirs", disk_error)
+        store.add("Bob", "bob@example.com", "")
+    # What a write that died part-way leaves behind
+    with open(path, "ab") as f:
+        f.write(b'{"op": "add", "le')
+    
+    cara, _ = store.add("Cara", "cara@example.com", "")
+    assert len(lines(path)) == 3
+    reloaded = LeadStore(path)
+    assert reloaded.get_by_id(cara.id) is not None
+    assert reloaded.get_by_email("bob@example.com") is None
+
+
+def test_compaction_keeps_records_appended_while_it_runs(path, monkeypatch):
+    store = LeadStore(path)
+    lead, _ = store.add("Ada", "ada@example.com", "")
+    for status in ["CONTACTED", "NEW", "CONTACTED"]:
+        store.set_status(lead.id, status)
+    
+    real_open = open
+    appended = []
+    def open_and_append(file, mode="r", *args, **kwargs):
+        # Land a new lead between the snapshot and the tail copy
+        if str(file).endswith(".compact") and mode == "w" and not appended:
+            appended.append(store.add("Bob", "bob@example.com", "")[0])
+        return real_open(file, mode, *args, **kwargs)
+    monkeypatch.setattr(leads, "open", open_and_append, raising=False)
+    store.compact()
+    monkeypatch.undo()
+    
+    assert len(lines(path)) == 2
+    reloaded = LeadStore(path)
+    assert reloaded.get_by_id(lead.id).status == "CONTACTED"
+    assert reloaded.get_by_id(appended[0].id) is not None
+    assert store._records == 2
@@ -0,0 +1,238 @@
+"""
+Tests for the publish outbox: coalescing, debounce, backoff and offline retry.
+"""
+import dataclasses
+import threading
+import time
+
+import pytest
+
+from models import InventoryItem
+from outbox import RETRY_SECONDS, PublishOutbox
+from storage import Storage
+
+
+class StubPublisher:
+    """Records uploads instead of talking to GitHub."""
+    
+    def __init__(self):
+        self.files = []
+        self.images = []
+        self.error = None  # exception to raise from uploads
+    
+    def is_configured(self):
+        return True
+    
+    def publish_file(self, repo_path, content, message="Update inventory"):
+        if self.error:
+            raise self.error
+        self.files.append((repo_path, content))
+        return True, "Published successfully!"
+    
+    def publish_image(self, local_path, repo_path):
+        self.images.append((local_path, repo_path))
+        return True, "Image uploaded!"
+
+
+class Online:
+    """Switchable connectivity stub."""
+    
+    def __init__(self, online=True):
+        self.online = online
+    
+    def __call__(self):
+        return self.online
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = Storage(str(tmp_path / "inventory.json"))
+    storage.add(InventoryItem(
+        id="PT-2026-10-19-0001", category="pantry", name="Crickets",
+        variant="Large", price=9.99, quantity=100, image=""
+    ))
+    return storage
+
+
+def make_outbox(storage, tmp_path, clock, publisher=None, online=None, **kwargs):
+    publisher = publisher or StubPublisher()
+    builds = []
+    
+    def build_files():
+        builds.append(threading.current_thread())
+        return {"docs/inventory.json": storage.get_json_string()}
+    
+    outbox = PublishOutbox(
+        storage,
+        publisher,
+        build_files,
+        filepath=str(tmp_path / "outbox.json"),
+        quiet_seconds=30,
+        is_online=online or Online(),
+        clock=clock,
+        **kwargs
+    )
+    return outbox, publisher, builds
+
+
+def sell_one(storage):
+    item = storage.items[0]
+    storage.update(item.id, dataclasses.replace(item, quantity=item.quantity - 1))
+
+
+def test_burst_of_edits_is_one_upload(storage, tmp_path, clock):
+    outbox, publisher, builds = make_outbox(storage, tmp_path, clock)
+    for _ in range(50):
+        sell_one(storage)
+    
+    assert outbox.flush() == (True, "Published!")
+    assert len(builds) == 1
+    assert len(publisher.files) == 1
+    assert '"quantity": 50' in publisher.files[0][1]
+    assert not outbox.pending
+
+
+def test_waits_for_quiet_period(storage, tmp_path, clock):
+    outbox, _, _ = make_outbox(storage, tmp_path, clock)
+    sell_one(storage)
+    
+    clock.now += 29
+    assert not outbox.due()
+    sell_one(storage)  # a new edit restarts the quiet period
+    clock.now += 29
+    assert not outbox.due()
+    clock.now += 1
+    assert outbox.due()
+
+
+def test_offline_retries_with_backoff_and_survives_restart(storage, tmp_path, clock):
+    online = Online(False)
+    outbox, publisher, _ = make_outbox(storage, tmp_path, clock, online=online)
+    sell_one(storage)
+    clock.now += 30
+    
+    success, message = outbox.flush()
+    assert not success and message.startswith("Offline")
+    assert outbox.state["attempts"] == 1
+    assert outbox.state["next_attempt"] == clock.now + RETRY_SECONDS[0]
+    assert not outbox.due()
+    
+    clock.now += RETRY_SECONDS[0]
+    outbox.flush()
+    assert outbox.state["next_attempt"] == clock.now + RETRY_SECONDS[1]
+    
+    # App restarts while still offline - the pending publish is remembered
+    restarted, publisher, _ = make_outbox(storage, tmp_path, clock, online=online)
+    assert restarted.pending
+    assert restarted.state["attempts"] == 2
+    
+    online.online = True
+    clock.now += RETRY_SECONDS[1]
+    assert restarted.due()
+    assert restarted.flush() == (True, "Published!")
+    assert len(publisher.files) == 1
+    assert restarted.state["attempts"] == 0
+    assert not restarted.pending
+
+
+def test_backoff_is_capped(storage, tmp_path, clock):
+    outbox, _, _ = make_outbox(storage, tmp_path, clock, online=Online(False))
+    sell_one(storage)
+    for _ in range(len(RETRY_SECONDS) + 3):
+        outbox.flush()
+    assert outbox.state["next_attempt"] == clock.now + RETRY_SECONDS[-1]
+
+
+def test_publisher_exception_is_a_failed_attempt(storage, tmp_path, clock):
+    outbox, publisher, _ = make_outbox(storage, tmp_path, clock)
+    publisher.error = ConnectionError("network dropped")
+    sell_one(storage)
+    
+    success, message = outbox.flush()
+    
+    assert not success
+    assert "network dropped" in message
+    assert outbox.state["attempts"] == 1
+    assert outbox.pending
+    assert not outbox.due()  # backing off, not retrying every poll
+    
+    publisher.error = None
+    assert outbox.flush()[0]
+
+
+def test_build_failure_is_a_failed_attempt(storage, tmp_path, clock):
+    outbox, _, _ = make_outbox(storage, tmp_path, clock)
+    outbox.build_files = lambda: 1 / 0
+    sell_one(storage)
+    
+    success, message = outbox.flush()
+    
+    assert not success
+    assert message.startswith("Could not build publish files")
+    assert outbox.state["attempts"] == 1
+    assert not outbox._flushing
+
+
+def test_edits_during_upload_stay_pending(storage, tmp_path, clock):
+    outbox, publisher, _ = make_outbox(storage, tmp_path, clock)
+    sell_one(storage)
+    
+    upload = publisher.publish_file
+    def publish_and_edit(*args):
+        sell_one(storage)
+        return upload(*args)
+    publisher.publish_file = publish_and_edit
+    
+    assert outbox.flush()[0]
+    assert outbox.pending
+
+
+def test_poll_builds_snapshot_on_calling_thread(storage, tmp_path, clock):
+    outbox, publisher, builds = make_outbox(storage, tmp_path, clock)
+    sell_one(storage)
+    clock.now += 30
+    
+    assert outbox.poll()
+    deadline = time.time() + 5
+    while outbox.last_result is None and time.time() < deadline:
+        time.sleep(0.01)
+    
+    assert builds == [threading.current_thread()]
+    assert outbox.last_result == (True, "Published!")
+    assert len(publisher.files) == 1
+
+
+def test_images_upload_before_snapshot(storage, tmp_path, clock):
+    outbox, publisher, _ = make_outbox(storage, tmp_path, clock)
+    outbox.queue_image("/old/gecko.jpg", "docs/Assets/gecko.jpg")
+    outbox.queue_image("/new/gecko.jpg", "docs/Assets/gecko.jpg")  # re-queue replaces
+    
+    assert outbox.flush()[0]
+    assert publisher.images == [("/new/gecko.jpg", "docs/Assets/gecko.jpg")]
+    assert outbox.state["images"] == {}
+
+
+def test_publish_files_backend_gets_one_call(storage, tmp_path, clock):
+    class BatchPublisher(StubPublisher):
+        def publish_files(self, files, message):
+            self.files.append(files)
+            return True, "Published successfully!"
+    
+    published = []
+    outbox, publisher, _ = make_outbox(storage, tmp_path, clock, publisher=BatchPublisher(), on_published=published.append)
+    sell_one(storage)
+    
+    assert outbox.flush()[0]
+    assert len(publisher.files) == 1
+    assert list(publisher.files[0]) == ["docs/inventory.json"]
+    assert list(published[0]) == ["docs/inventory.json"]
+
+
+def test_defaults_to_publisher_reachability(storage, tmp_path):
+    class ReachablePublisher(StubPublisher):
+        def is_reachable(self):
+            return False
+    
+    publisher = ReachablePublisher()
+    outbox = PublishOutbox(storage, publisher, dict, filepath=str(tmp_path / "outbox.json"))
+    assert outbox.is_online == publisher.is_reachable
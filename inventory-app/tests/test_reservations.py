@@ -0,0 +1,125 @@
+"""
+Tests for the reservation engine: hold expiry, group-committed saves and the HTTP load test.
+"""
+import json
+import threading
+
+import pytest
+
+from models import InventoryItem
+from reservations import SAVE_FAILED, ReservationEngine, run_load_test
+from storage import Storage
+
+
+SKU = "PT-2026-10-19-AB12"
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = Storage(str(tmp_path / "inventory.json"))
+    storage.add(InventoryItem(
+        id=SKU, category="pantry", name="Crickets", variant="Large",
+        price=9.99, quantity=3, image=""
+    ))
+    return storage
+
+
+def on_disk_quantity(storage):
+    with open(storage.filepath, "r", encoding="utf-8") as f:
+        return next(item["quantity"] for item in json.load(f) if item["id"] == SKU)
+
+
+def test_hold_expires_and_returns_stock(storage, clock):
+    engine = ReservationEngine(storage, hold_seconds=60, clock=clock)
+    hold, _ = engine.reserve(SKU, 2)
+    assert engine.available(SKU) == 1
+    
+    clock.now += 59
+    assert engine.available(SKU) == 1
+    clock.now += 1
+    assert engine.available(SKU) == 3
+    
+    success, message = engine.confirm(hold.id)
+    assert not success
+    assert message == "Hold not found or expired"
+    assert storage.get_by_id(SKU).quantity == 3
+
+
+def test_released_hold_is_skipped_when_it_would_have_expired(storage, clock):
+    engine = ReservationEngine(storage, hold_seconds=60, clock=clock)
+    first, _ = engine.reserve(SKU, 1)
+    assert engine.release(first.id)
+    clock.now += 30
+    second, _ = engine.reserve(SKU, 2)
+    
+    # The released hold's heap entry comes due first and must not touch the live one
+    clock.now += 30
+    assert engine.available(SKU) == 1
+    assert engine.confirm(second.id)[0]
+    assert on_disk_quantity(storage) == 1
+
+
+def test_reserve_rejects_more_than_available(storage, clock):
+    engine = ReservationEngine(storage, clock=clock)
+    assert engine.reserve(SKU, 2)[0] is not None
+    hold, message = engine.reserve(SKU, 2)
+    assert hold is None
+    assert message == "Not enough stock available"
+
+
+def test_failed_save_is_reported_and_written_by_the_next_save(storage, clock, monkeypatch):
+    engine = ReservationEngine(storage, clock=clock)
+    first, _ = engine.reserve(SKU, 1)
+    second, _ = engine.reserve(SKU, 1)
+    
+    save = storage.save
+    def full_disk():
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(storage, "save", full_disk)
+    success, message = engine.confirm(first.id)
+    assert not success
+    assert message.startswith(SAVE_FAILED)
+    assert storage.get_by_id(SKU).quantity == 2
+    assert on_disk_quantity(storage) == 3
+    
+    monkeypatch.setattr(storage, "save", save)
+    assert engine.confirm(second.id) == (True, "Purchase confirmed")
+    assert on_disk_quantity(storage) == 1
+
+
+def test_waiters_wake_when_the_leaders_save_fails(storage, clock, monkeypatch):
+    engine = ReservationEngine(storage, clock=clock)
+    holds = [engine.reserve(SKU, 1)[0] for _ in range(3)]
+    
+    started = threading.Event()
+    release = threading.Event()
+    def stuck_then_failing():
+        started.set()
+        release.wait()
+        raise OSError(13, "Permission denied")
+    monkeypatch.setattr(storage, "save", stuck_then_failing)
+    
+    results = {}
+    def confirm(hold):
+        results[hold.id] = engine.confirm(hold.id)
+    threads = [threading.Thread(target=confirm, args=(holds[0],))]
+    threads[0].start()
+    started.wait(timeout=5)
+    threads += [threading.Thread(target=confirm, args=(hold,)) for hold in holds[1:]]
+    for thread in threads[1:]:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    
+    assert len(results) == 3
+    assert all(not success and message.startswith(SAVE_FAILED) for success, message in results.values())
+
+
+def test_load_test_never_oversells():
+    summary = run_load_test(attempts=60, concurrency=12, stock=10, catalogue=50)
+    assert summary["oversold"] is False
+    assert summary["sold"] == 10
+    assert summary["remaining"] == 0
+    assert summary["errors"] == 0
@@ -0,0 +1,263 @@
+"""
+Tests for the storefront search index, including docs/app.js run under node against the published files.
+"""
+import dataclasses
+import json
+import os
+import random
+import shutil
+import subprocess
+
+import pytest
+
+import search_index
+from models import InventoryItem
+from search_index import TERM_PATTERN, SearchIndex, doc_shard_of, tokenize
+from storage import Storage
+
+
+APP_JS = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "docs", "app.js")
+
+# Loads app.js without a DOM, serves search/ from a folder and prints the result of each call
+NODE_HARNESS = r"""
+const fs = require('fs');
+const path = require('path');
+const vm = require('vm');
+const [appJs, siteDir, calls] = process.argv.slice(1);
+const context = vm.createContext({
+    console,
+    document: { addEventListener() {} },
+    fetch: async url => {
+        const file = path.join(siteDir, url);
+        if (!fs.existsSync(file)) return { ok: false };
+        return { ok: true, json: async () => JSON.parse(fs.readFileSync(file, 'utf8')) };
+    },
+});
+const App = vm.runInContext(fs.readFileSync(appJs, 'utf8') + '\n;App', context);
+(async () => {
+    const results = [];
+    for (const [method, args] of JSON.parse(calls)) results.push(await App[method](...args));
+    process.stdout.write(JSON.stringify(results));
+})();
+"""
+
+needs_node = pytest.mark.skipif(shutil.which("node") is None, reason="node is not installed")
+
+NAMES = ["Ball Python", "Blue-Tongue Skink", "Crested Gecko", "Superlongfirstword-Skink Hybrid", "Dubia Roaches"]
+VARIANTS = ["Pastel", "Banana", "Large", "Frozen"]
+PREFIXES = {"animals": "AN", "pantry": "PT", "habitats": "HB"}
+
+
+def run_app_js(calls, site_dir="."):
+    output = subprocess.run(
+        ["node", "-e", NODE_HARNESS, APP_JS, str(site_dir), json.dumps(calls)],
+        capture_output=True, text=True, check=True, timeout=60
+    )
+    return json.loads(output.stdout)
+
+
+def make_item(rng, n):
+    category = rng.choice(list(PREFIXES))
+    return InventoryItem(
+        id=f"{PREFIXES[category]}-2026-{rng.randint(1, 4):02d}-{rng.randint(1, 28):02d}-{n:04X}",
+        category=category,
+        name=rng.choice(NAMES),
+        variant=rng.choice(VARIANTS),
+        price=float(rng.randint(5, 900)),
+        quantity=1,
+        image=f"Assets/{n}.jpg",
+        status=rng.choice(["available", "available", "available", "sold"])
+    )
+
+
+def make_storage(tmp_path, count, seed=7):
+    rng = random.Random(seed)
+    storage = Storage(str(tmp_path / "inventory.json"))
+    with storage.batch():
+        for n in range(count):
+            storage.add(make_item(rng, n))
+    return storage
+
+
+def publish(index, site):
+    """Upload pending files into a {path: content} site, as the outbox would."""
+    files = index.pending_files()
+    site.update(files)
+    index.mark_published(files)
+    return files
+
+
+def write_site(site, folder):
+    for path, content in site.items():
+        os.makedirs(os.path.dirname(os.path.join(folder, path)), exist_ok=True)
+        with open(os.path.join(folder, path), "w", encoding="utf-8") as f:
+            f.write(content)
+
+
+def published_contents(index, site):
+    """Merge the files the published manifest points at back into (postings, docs)."""
+    manifest = json.loads(site[f"{index.search_path}/manifest.json"])
+    postings, docs = {}, {}
+    for key in manifest["token_shards"]:
+        for token, ids in json.loads(site[f"{index.search_path}/tokens_{key}.json"]).items():
+            assert index._shard_of(token) == key
+            postings[token] = set(ids)
+    for n in range(manifest["doc_shards"]):
+        for item_id, fields in json.loads(site[f"{index.search_path}/docs_{n}.json"]).items():
+            assert doc_shard_of(item_id, manifest["doc_shards"]) == n
+            docs[item_id] = tuple(fields)
+    return manifest, postings, docs
+
+
+def brute_force(storage, query, category=None):
+    terms = TERM_PATTERN.findall(query.lower())
+    return sorted(
+        item.id for item in storage.items
+        if item.status != "sold" and (category is None or item.category == category) and terms and all(
+            any(token.startswith(term) and ("-" in token) == ("-" in term) for token in tokenize(item))
+            for term in terms
+        )
+    )
+
+
+@needs_node
+def test_search_gives_the_same_results_sharded_and_unsharded(tmp_path, monkeypatch):
+    storage = make_storage(tmp_path, 800)
+    queries = [
+        ("pt", None), ("ball", None), ("ball py", None), ("blue", None), ("blue-t", None),
+        ("skink", "animals"), ("superlongfirstword-sk", None), ("an-2026-03", None),
+        ("pt-2026-01-0", None), ("py bana", None), ("hb-2026 gecko", None), ("zzz", None),
+    ]
+    calls = [["searchCatalog", list(query)] for query in queries]
+    
+    results = {}
+    for sharded, single_shard_max in [(True, search_index.SINGLE_SHARD_MAX), (False, 10 ** 6)]:
+        monkeypatch.setattr(search_index, "SINGLE_SHARD_MAX", single_shard_max)
+        index = SearchIndex(storage, search_path="search", state_path=str(tmp_path / f"state_{sharded}.json"))
+        site = {}
+        publish(index, site)
+        assert json.loads(site["search/manifest.json"])["sharded"] is sharded
+        write_site(site, tmp_path / f"site_{sharded}")
+        results[sharded] = [sorted(doc["id"] for doc in found) for found in run_app_js(calls, tmp_path / f"site_{sharded}")]
+    
+    assert results[True] == results[False]
+    assert results[True] == [brute_force(storage, *query) for query in queries]
+    assert results[True][0] == []  # plain "pt" is a word search, not a SKU prefix
+    assert results[True][7]  # the queries actually find things
+
+
+def test_incremental_index_matches_a_rebuild(tmp_path, monkeypatch):
+    # Small thresholds so the random edits cross them both ways
+    monkeypatch.setattr(search_index, "SINGLE_SHARD_MAX", 30)
+    monkeypatch.setattr(search_index, "DOCS_PER_SHARD", 8)
+    rng = random.Random(2026)
+    storage = Storage(str(tmp_path / "inventory.json"))
+    index = SearchIndex(storage, search_path="search", state_path=str(tmp_path / "state.json"))
+    site = {}
+    next_id = 0
+    
+    for step in range(400):
+        action = rng.random()
+        grow = (step // 100) % 2 == 0  # alternate growing and shrinking phases
+        if action < 0.1 and storage.can_undo():
+            storage.undo()
+        elif not storage.items or action < (0.8 if grow else 0.2):
+            storage.add(make_item(rng, next_id))
+            next_id += 1
+        elif action < 0.7:
+            item = rng.choice(storage.items)
+            changes = rng.choice([
+                {"name": rng.choice(NAMES)},
+                {"price": float(rng.randint(5, 900))},
+                {"status": rng.choice(["available", "sold"])},
+                {"quantity": item.quantity + 1},  # not a field the index shows
+            ])
+            storage.update(item.id, dataclasses.replace(item, **changes))
+        else:
+            storage.delete(rng.choice(storage.items).id)
+        
+        if step % 20:
+            continue
+        publish(index, site)
+        fresh = SearchIndex(storage, search_path="search", state_path=str(tmp_path / "fresh.json"))
+        storage._listeners.remove(fresh._on_change)
+        
+        assert index._postings == fresh._postings
+        assert index._docs == fresh._docs
+        assert index._sharded == fresh._sharded
+        manifest, postings, docs = published_contents(index, site)
+        assert postings == fresh._postings
+        assert docs == fresh._docs
+        assert manifest["sharded"] == (len(fresh._docs) > 30)
+
+
+def test_reshards_at_the_size_thresholds(tmp_path):
+    storage = Storage(str(tmp_path / "inventory.json"))
+    index = SearchIndex(storage, search_path="search", state_path=str(tmp_path / "state.json"))
+    rng = random.Random(1)
+    layouts = {}
+    with storage.batch():
+        for n in range(501):
+            storage.add(dataclasses.replace(make_item(rng, n), status="available"))
+            layouts[n + 1] = (index._sharded, index._doc_shards)
+            if n + 1 == 500:
+                site = {}
+                publish(index, site)
+    
+    assert layouts[200] == (False, 1)
+    assert layouts[201] == (False, 2)
+    assert layouts[400] == (False, 2)
+    assert layouts[401] == (False, 4)
+    assert layouts[500] == (False, 4)
+    assert layouts[501] == (True, 4)
+    
+    # The single shard that was published is emptied rather than left stale
+    files = publish(index, site)
+    assert files["search/tokens_all.json"] == "{}"
+    manifest = json.loads(files["search/manifest.json"])
+    assert manifest["sharded"] and "all" not in manifest["token_shards"]
+    
+    # Shrinking waits until the shards are a quarter full
+    with storage.batch():
+        while len(storage.items) > 201:
+            storage.delete(storage.items[-1].id)
+            assert index._sharded == (len(storage.items) > 500)
+            assert index._doc_shards == 4
+        storage.delete(storage.items[-1].id)
+        assert index._doc_shards == 2
+        while len(storage.items) > 101:
+            storage.delete(storage.items[-1].id)
+        assert index._doc_shards == 2
+        storage.delete(storage.items[-1].id)
+        assert index._doc_shards == 1
+
+
+def test_file_changed_during_upload_stays_dirty(tmp_path):
+    storage = make_storage(tmp_path, 5)
+    index = SearchIndex(storage, search_path="search", state_path=str(tmp_path / "state.json"))
+    files = index.pending_files()
+    assert "search/manifest.json" in files
+    
+    # An edit lands while those files are being uploaded
+    item = next(item for item in storage.items if item.status != "sold")
+    storage.update(item.id, dataclasses.replace(item, price=item.price + 1))
+    index.mark_published(files)
+    
+    pending = index.pending_files()
+    assert list(pending) == [f"search/docs_{doc_shard_of(item.id, index._doc_shards)}.json"]
+    assert json.loads(pending[list(pending)[0]])[item.id][3] == item.price + 1
+    
+    index.mark_published(pending)
+    assert index.pending_files() == {}
+    
+    # Published hashes survive a restart
+    assert SearchIndex(storage, search_path="search", state_path=str(tmp_path / "state.json")).pending_files() == {}
+
+
+@needs_node
+def test_doc_shard_of_matches_app_js():
+    ids = ["AN-2026-10-19-AB12", "", "gecko-ÆØÅ", "日本のヤモリ", "🐍-ball-🐍", "mixed-é-🦎-z" * 20]
+    counts = [1, 2, 7, 64, 1000, 2 ** 31 + 11]
+    pairs = [(item_id, count) for item_id in ids for count in counts]
+    expected = [doc_shard_of(item_id, count) for item_id, count in pairs]
+    assert run_app_js([["docShardOf", list(pair)] for pair in pairs]) == expected
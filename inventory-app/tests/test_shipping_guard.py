@@ -0,0 +1,145 @@
+"""
+Tests for the shipping guard: rules, TTL cache and batched lookups.
+"""
+import threading
+from datetime import date, timedelta
+
+import pytest
+
+from shipping_guard import Forecast, ForecastProvider, ShippingGuard, StaticForecastProvider, evaluate, next_ship_day
+
+
+MONDAY = date(2026, 10, 19)
+THURSDAY = date(2026, 10, 22)
+
+
+def make_guard(forecasts=None, **kwargs):
+    provider = StaticForecastProvider(forecasts or {}, default=(60, 75))
+    kwargs.setdefault("batch_window", 0)
+    return ShippingGuard(provider, **kwargs), provider
+
+
+def test_rules():
+    assert evaluate(Forecast("1", 50, 80), MONDAY).reason == "OK to ship"
+    assert evaluate(Forecast("1", 35, 50), MONDAY).hold_for_pickup
+    assert not evaluate(Forecast("1", 25, 50), MONDAY).allowed
+    assert not evaluate(Forecast("1", 70, 95), MONDAY).allowed
+    assert not evaluate(Forecast("1", 50, 80), THURSDAY).allowed
+
+
+def test_next_ship_day():
+    assert next_ship_day(MONDAY) == MONDAY
+    assert next_ship_day(THURSDAY) == date(2026, 10, 26)
+
+
+def test_provider_is_abstract():
+    with pytest.raises(TypeError):
+        ForecastProvider()
+
+
+class DailyProvider(ForecastProvider):
+    """Different weather per day: freezing today, mild from tomorrow on."""
+    
+    def __init__(self, today):
+        self.today = today
+        self.days = []
+    
+    def fetch(self, zip_codes, day):
+        self.days.append(day)
+        temps = (20, 35) if day <= self.today else (55, 70)
+        return {zip_code: Forecast(zip_code, *temps, day=day) for zip_code in zip_codes}
+
+
+def test_future_ship_date_uses_the_delivery_day_forecast():
+    # Freezing on the day of the check, mild on Tuesday when a Monday shipment arrives
+    provider = DailyProvider(today=MONDAY - timedelta(days=3))
+    guard = ShippingGuard(provider, batch_window=0)
+    decision = guard.check("10001", MONDAY)
+    assert provider.days == [MONDAY + timedelta(days=1)]
+    assert decision.allowed
+    assert decision.forecast.day == MONDAY + timedelta(days=1)
+    
+    provider.today = MONDAY + timedelta(days=1)
+    assert guard.check("10001", MONDAY).allowed  # cached for that date
+    assert not guard.check("10001", MONDAY - timedelta(days=7)).allowed
+
+
+def test_cache_is_per_forecast_date():
+    guard, provider = make_guard()
+    tuesday = MONDAY + timedelta(days=1)
+    guard.check("10001", MONDAY)
+    guard.check("10001", tuesday)
+    guard.check("10001", MONDAY)
+    assert provider.calls == [["10001"], ["10001"]]
+    assert provider.days == [tuesday, tuesday + timedelta(days=1)]
+
+
+def test_cached_within_ttl_and_refetched_after(clock):
+    guard, provider = make_guard(ttl_seconds=60, clock=clock)
+    
+    guard.check("10001", MONDAY)
+    clock.now += 59
+    guard.check("10001", MONDAY)
+    assert provider.calls == [["10001"]]
+    
+    clock.now += 2
+    guard.check("10001", MONDAY)
+    assert provider.calls == [["10001"], ["10001"]]
+
+
+def test_region_digits_share_a_cache_entry():
+    guard, provider = make_guard(region_digits=3)
+    guard.check("10001", MONDAY)
+    guard.check("10002", MONDAY)
+    assert provider.calls == [["10001"]]
+
+
+def test_check_many_fetches_misses_in_one_call():
+    guard, provider = make_guard()
+    guard.check("10001", MONDAY)
+    decisions = guard.check_many(["10001", "33101", "60601"], MONDAY)
+    assert set(decisions) == {"10001", "33101", "60601"}
+    assert provider.calls == [["10001"], ["33101", "60601"]]
+
+
+def test_concurrent_checks_are_batched_and_deduplicated():
+    guard, provider = make_guard(batch_window=0.2)
+    zip_codes = [f"{10000 + i % 5}" for i in range(40)]  # 5 distinct ZIPs
+    barrier = threading.Barrier(len(zip_codes))
+    results = {}
+    
+    def check(i, zip_code):
+        barrier.wait()
+        results[i] = guard.check(zip_code, MONDAY)
+    
+    threads = [threading.Thread(target=check, args=(i, z)) for i, z in enumerate(zip_codes)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert len(provider.calls) == 1
+    assert sorted(provider.calls[0]) == sorted(set(zip_codes))
+    assert all(decision.allowed for decision in results.values())
+
+
+def test_provider_failure_blocks_shipping():
+    class Failing(ForecastProvider):
+        def fetch(self, zip_codes, day):
+            raise ConnectionError("weather service down")
+    
+    guard = ShippingGuard(Failing(), batch_window=0)
+    decision = guard.check("10001", MONDAY)
+    assert not decision.allowed
+    assert decision.reason == "Forecast unavailable"
+
+
+def test_unknown_zip_blocks_shipping():
+    guard = ShippingGuard(StaticForecastProvider({}), batch_window=0)
+    assert not guard.check("99999", MONDAY).allowed
+
+
+def test_default_ship_date_is_next_ship_day():
+    guard, _ = make_guard()
+    # Whatever today is, the default date is a ship day, so a mild forecast passes
+    assert guard.check("10001").allowed
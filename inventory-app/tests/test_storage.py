@@ -0,0 +1,178 @@
+"""
+Tests for Storage undo/redo history and background saves.
+"""
+import dataclasses
+import json
+import random
+import threading
+
+import pytest
+
+from models import InventoryItem
+from storage import Storage
+
+
+def make_item(n, **changes):
+    item = InventoryItem(
+        id=f"PT-2026-10-19-{n:04X}", category="pantry", name=f"Feeder {n}",
+        variant="Medium", price=10.0 + n, quantity=5, image=""
+    )
+    return dataclasses.replace(item, **changes)
+
+
+def wait_for_saves():
+    for thread in threading.enumerate():
+        if thread is not threading.main_thread() and not thread.daemon:
+            thread.join()
+
+
+def on_disk(storage):
+    wait_for_saves()
+    with open(storage.filepath, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def ids(storage):
+    return [item.id for item in storage.items]
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = Storage(str(tmp_path / "inventory.json"))
+    with storage.batch():
+        for n in range(4):
+            storage.add(make_item(n))
+    return storage
+
+
+def test_undo_redo_update(storage):
+    original = storage.items[1]
+    storage.update(original.id, dataclasses.replace(original, quantity=0))
+    
+    assert storage.undo()
+    assert storage.items[1] == original
+    assert on_disk(storage)[1]["quantity"] == 5
+    
+    assert storage.redo()
+    assert storage.items[1].quantity == 0
+    assert on_disk(storage)[1]["quantity"] == 0
+
+
+def test_undo_deletes_restore_original_positions(storage):
+    before = ids(storage)
+    storage.delete(before[1])
+    storage.delete(before[0])  # shifts the remaining items left
+    
+    storage.undo()
+    storage.undo()
+    
+    assert ids(storage) == before
+
+
+def test_undo_delete_at_index_past_the_end_appends(storage):
+    before = ids(storage)
+    storage.delete(before[3])
+    del storage.items[0:2]  # list shrinks outside the history
+    
+    storage.undo()
+    
+    assert ids(storage) == [before[2], before[3]]
+
+
+def test_locate_falls_back_to_id_when_index_is_stale(storage):
+    target = storage.items[2]
+    storage.update(target.id, dataclasses.replace(target, price=99.0))
+    storage.items.insert(0, make_item(9))  # shifts everything right, outside the history
+    
+    storage.undo()
+    
+    assert storage.get_by_id(target.id) == target
+    assert storage.items[3] == target
+
+
+def test_batch_undoes_as_one_step(storage):
+    before = list(storage.items)
+    with storage.batch():
+        for item in before:
+            storage.update(item.id, dataclasses.replace(item, quantity=0))
+        storage.add(make_item(10))
+    
+    assert storage.undo()
+    assert storage.items == before
+    assert storage.undo()  # the fixture's own batch of adds
+    assert storage.items == []
+    assert not storage.can_undo()
+
+
+def test_new_edit_clears_redo(storage):
+    storage.delete(storage.items[0].id)
+    storage.undo()
+    assert storage.can_redo()
+    
+    storage.add(make_item(11))
+    
+    assert not storage.can_redo()
+    assert not storage.redo()
+
+
+def test_history_limit_evicts_oldest(tmp_path):
+    storage = Storage(str(tmp_path / "inventory.json"), history_limit=3)
+    for n in range(5):
+        storage.add(make_item(n))
+    
+    undone = 0
+    while storage.undo():
+        undone += 1
+    
+    assert undone == 3
+    assert len(storage.items) == 2
+
+
+def test_older_background_write_never_overwrites_newer_save(storage):
+    stale = storage._snapshot()
+    storage.delete(storage.items[0].id)  # saves a newer snapshot
+    
+    storage._write(*stale)
+    
+    assert len(on_disk(storage)) == 3
+
+
+def test_reload_clears_history(storage):
+    storage.delete(storage.items[0].id)
+    storage.load()
+    assert not storage.can_undo()
+
+
+def test_random_edits_undo_redo_keep_disk_and_memory_consistent(tmp_path):
+    rng = random.Random(1234)
+    storage = Storage(str(tmp_path / "inventory.json"), history_limit=1000)
+    states = [[]]  # snapshot after each edit
+    position = 0  # index of the current state in `states`
+    next_id = 0
+    
+    for step in range(400):
+        action = rng.random()
+        if action < 0.2 and storage.can_undo():
+            assert storage.undo()
+            position -= 1
+        elif action < 0.3 and storage.can_redo():
+            assert storage.redo()
+            position += 1
+        else:
+            if not storage.items or rng.random() < 0.4:
+                storage.add(make_item(next_id))
+                next_id += 1
+            elif rng.random() < 0.5:
+                item = rng.choice(storage.items)
+                storage.update(item.id, dataclasses.replace(item, quantity=rng.randint(0, 9)))
+            else:
+                storage.delete(rng.choice(storage.items).id)
+            position += 1
+            del states[position:]
+            states.append(list(storage.items))
+        
+        assert storage.items == states[position]
+        if step % 50 == 0:
+            assert on_disk(storage) == [item.to_dict() for item in storage.items]
+    
+    assert on_disk(storage) == [item.to_dict() for item in storage.items]
@@ -0,0 +1,123 @@
+"""
+Tests for subscription scheduling, processing runs and crash ordering.
+"""
+import dataclasses
+import json
+import os
+from datetime import date
+
+import pytest
+
+from models import InventoryItem
+from storage import Storage
+from subscriptions import SubscriptionEngine, advance
+
+
+TUESDAY = date(2026, 10, 20)
+SKU = "PT-2026-10-19-AB12"
+
+
+@pytest.fixture
+def storage(tmp_path):
+    storage = Storage(str(tmp_path / "inventory.json"))
+    storage.add(InventoryItem(
+        id=SKU, category="pantry", name="Dubia Roaches", variant="Medium",
+        price=20.0, quantity=5, image=""
+    ))
+    return storage
+
+
+@pytest.fixture
+def engine(storage, tmp_path):
+    return SubscriptionEngine(storage, str(tmp_path / "subscriptions.json"))
+
+
+@pytest.mark.parametrize("ship_date, expected", [
+    (date(2026, 1, 31), date(2026, 2, 28)),
+    (date(2028, 1, 31), date(2028, 2, 29)),
+    (date(2026, 3, 31), date(2026, 4, 30)),
+    (date(2026, 12, 15), date(2027, 1, 15)),
+    (date(2026, 11, 30), date(2026, 12, 30)),
+])
+def test_monthly_advance_clamps_to_month_length(ship_date, expected):
+    assert advance(ship_date, "monthly") == expected
+
+
+def test_weekly_and_biweekly_advance():
+    assert advance(TUESDAY, "weekly") == date(2026, 10, 27)
+    assert advance(TUESDAY, "biweekly") == date(2026, 11, 3)
+
+
+def test_skipped_subscription_ships_once_at_its_new_date(engine):
+    sub = engine.subscribe("a@example.com", SKU, 1, "weekly", first_ship=TUESDAY)
+    assert engine.skip(sub.id)
+    
+    # The old heap entry for TUESDAY is stale and must not ship
+    shipments, _ = engine.process(TUESDAY)
+    assert shipments == []
+    shipments, _ = engine.process(date(2026, 10, 27))
+    assert [s.subscription_id for s in shipments] == [sub.id]
+
+
+def test_cancelled_subscription_never_ships(engine, storage):
+    sub = engine.subscribe("a@example.com", SKU, 1, "weekly", first_ship=TUESDAY)
+    assert engine.cancel(sub.id)
+    assert engine.process(TUESDAY) == ([], [])
+    assert storage.get_by_id(SKU).quantity == 5
+
+
+def test_shortfall_stays_due_for_the_next_run(engine, storage):
+    first = engine.subscribe("a@example.com", SKU, 4, "monthly", first_ship=TUESDAY)
+    second = engine.subscribe("b@example.com", SKU, 3, "monthly", first_ship=date(2026, 10, 21))
+    
+    shipments, shortfalls = engine.process(TUESDAY)
+    assert [s.subscription_id for s in shipments] == [first.id]
+    assert [(s.subscription_id, s.requested, s.available) for s in shortfalls] == [(second.id, 3, 1)]
+    assert storage.get_by_id(SKU).quantity == 1
+    assert engine.subscriptions[second.id].next_ship == date(2026, 10, 21)
+    
+    storage.update(SKU, dataclasses.replace(storage.get_by_id(SKU), quantity=10))
+    shipments, shortfalls = engine.process(date(2026, 10, 27))
+    assert [s.subscription_id for s in shipments] == [second.id]
+    assert shortfalls == []
+    assert engine.subscriptions[second.id].next_ship == date(2026, 11, 21)
+
+
+def test_processed_run_is_saved_with_advanced_dates(engine, storage, tmp_path):
+    sub = engine.subscribe("a@example.com", SKU, 2, "biweekly", first_ship=TUESDAY)
+    shipments, _ = engine.process(TUESDAY)
+    assert shipments[0].unit_price == 18.0
+    
+    reloaded = SubscriptionEngine(Storage(storage.filepath), engine.filepath)
+    assert reloaded.subscriptions[sub.id].next_ship == date(2026, 11, 3)
+    assert Storage(storage.filepath).get_by_id(SKU).quantity == 3
+    assert not os.path.exists(engine.run_path)
+
+
+def test_crash_before_stock_save_does_not_ship_twice(engine, storage, monkeypatch):
+    sub = engine.subscribe("a@example.com", SKU, 2, "weekly", first_ship=TUESDAY)
+    
+    def crash():
+        raise OSError(28, "No space left on device")
+    monkeypatch.setattr(storage, "save", crash)
+    with pytest.raises(OSError):
+        engine.process(TUESDAY)
+    
+    # Restart: the subscription was already advanced, so the run isn't filled
+    # again - its shipments come back from the marker instead
+    restarted = SubscriptionEngine(Storage(storage.filepath), engine.filepath)
+    assert restarted.subscriptions[sub.id].next_ship == date(2026, 10, 27)
+    shipments, _ = restarted.process(TUESDAY)
+    assert [s.subscription_id for s in shipments] == [sub.id]
+    assert restarted.storage.get_by_id(SKU).quantity == 5
+    assert not os.path.exists(restarted.run_path)
+    
+    shipments, _ = restarted.process(TUESDAY)
+    assert shipments == []
+
+
+def test_subscriptions_file_is_replaced_atomically(engine):
+    engine.subscribe("a@example.com", SKU, 1, "weekly", first_ship=TUESDAY)
+    assert not os.path.exists(engine.filepath + ".tmp")
+    with open(engine.filepath, "r", encoding="utf-8") as f:
+        assert len(json.load(f)) == 1
@@ -0,0 +1,110 @@
+"""
+Tests for the thumbnail cache: background decoding, LRU budget and the disk cache.
+"""
+import os
+import time
+
+import pytest
+from PIL import Image
+
+from ui.thumbnails import ThumbnailCache
+
+
+def make_image(tmp_path, name, size=(400, 300), color="green"):
+    path = tmp_path / name
+    Image.new("RGB", size, color).save(path, "JPEG")
+    return str(path)
+
+
+def fetch(cache, path):
+    """Request a thumbnail and poll until its callback runs."""
+    received = []
+    cached = cache.get(path, received.append)
+    if cached is not None:
+        return cached
+    deadline = time.monotonic() + 5
+    while not received and time.monotonic() < deadline:
+        cache.poll()
+        time.sleep(0.01)
+    return received[0] if received else None
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = ThumbnailCache(disk_dir=str(tmp_path / "thumbs"))
+    yield cache
+    cache.shutdown()
+
+
+def test_decodes_in_background_then_serves_from_memory(cache, tmp_path):
+    path = make_image(tmp_path, "photo.jpg")
+    image = fetch(cache, path)
+    assert image.size == (64, 48)
+    assert cache.get(path, lambda _: None) is image
+
+
+def test_memory_budget_evicts_least_recently_used(tmp_path):
+    cache = ThumbnailCache(max_bytes=64 * 48 * 3 * 2, workers=1)
+    try:
+        paths = [make_image(tmp_path, f"{n}.jpg") for n in range(3)]
+        first = fetch(cache, paths[0])
+        fetch(cache, paths[1])
+        assert cache.get(paths[0], lambda _: None) is first  # now most recent
+        fetch(cache, paths[2])
+        assert cache.get(paths[0], lambda _: None) is first
+        assert cache.get(paths[1], lambda _: None) is None
+    finally:
+        cache.shutdown()
+
+
+def test_failed_disk_write_keeps_the_thumbnail(cache, tmp_path, monkeypatch):
+    path = make_image(tmp_path, "photo.jpg")
+    save = Image.Image.save
+    def read_only_disk(image, fp, *args, **kwargs):
+        if str(fp).startswith(cache.disk_dir):
+            raise OSError(30, "Read-only file system")
+        return save(image, fp, *args, **kwargs)
+    monkeypatch.setattr(Image.Image, "save", read_only_disk)
+    
+    image = fetch(cache, path)
+    assert image is not None
+    assert image.size == (64, 48)
+    assert os.listdir(cache.disk_dir) == []
+
+
+def test_unreadable_disk_entry_falls_back_to_the_source(cache, tmp_path):
+    path = make_image(tmp_path, "photo.jpg")
+    with open(cache._disk_path(cache._key(path)), "wb") as f:
+        f.write(b"not a png")
+    
+    image = fetch(cache, path)
+    assert image.size == (64, 48)
+    with Image.open(cache._disk_path(cache._key(path))) as cached:
+        assert cached.size == (64, 48)
+
+
+def test_disk_cache_is_reused_across_instances(cache, tmp_path):
+    path = make_image(tmp_path, "photo.jpg", color="red")
+    fetch(cache, path)
+    cached_path = cache._disk_path(cache._key(path))
+    assert os.path.exists(cached_path)
+    
+    again = ThumbnailCache(disk_dir=cache.disk_dir)
+    try:
+        image = fetch(again, path)
+        assert image.getpixel((0, 0))[0] > 200
+    finally:
+        again.shutdown()
+
+
+def test_startup_prunes_least_recently_used_files(tmp_path):
+    disk_dir = tmp_path / "thumbs"
+    disk_dir.mkdir()
+    for n in range(5):
+        path = disk_dir / f"{n}.png"
+        path.write_bytes(b"x" * 1000)
+        os.utime(path, (1000 + n, 1000 + n))
+    
+    cache = ThumbnailCache(disk_dir=str(disk_dir), max_disk_bytes=2500)
+    cache._executor.shutdown(wait=True)  # let the startup prune finish
+    assert sorted(os.listdir(disk_dir)) == ["3.png", "4.png"]
@@ -2,7 +2,7 @@
 Main Window - Inventory Manager
 """
 import customtkinter as ctk
-from tkinter import messagebox
+from tkinter import messagebox, Entry, Text
 import sys
 import os
 
@@ -10,9 +10,15 @@ import os
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from storage import Storage
+from indexes import InventoryIndex, SORT_OPTIONS
+from stats import InventoryStats
+from outbox import PublishOutbox, DEFAULT_QUIET_SECONDS
+from search_index import SearchIndex
 from github_api import GitHubPublisher
+from git_publisher import GitPublisher
 from models import CATEGORIES, InventoryItem
 from ui.item_dialog import ItemDialog
+from ui.thumbnails import ThumbnailCache, resolve_image_path
 
 
 class MainWindow(ctk.CTk):
@@ -28,7 +34,35 @@ class MainWindow(ctk.CTk):
         
         # Initialize storage and publisher
         self.storage = Storage()
+        self.index = InventoryIndex(self.storage)
+        self.stats = InventoryStats(self.storage)
         self.publisher = GitHubPublisher()
+        if self.publisher.config.get("publish_backend") == "git":
+            self.publisher = GitPublisher()
+        
+        # Storefront search shards, republished only when searchable fields change
+        self.search_index = SearchIndex(
+            self.storage,
+            search_path=self.publisher.config.get("search_path", "docs/search")
+        )
+        
+        # Durable outbox - edits are coalesced and auto-published when quiet
+        self.outbox = PublishOutbox(
+            self.storage,
+            self.publisher,
+            self._publish_files,
+            quiet_seconds=self.publisher.config.get("auto_publish_delay", DEFAULT_QUIET_SECONDS),
+            on_published=self.search_index.mark_published
+        )
+        self.auto_publish = self.publisher.config.get("auto_publish", True)
+        self._shown_outbox_result = None
+        
+        # Item card previews (decoded off the Tk thread, persisted in .thumbnails/)
+        self.thumbnails = ThumbnailCache(
+            disk_dir=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), ".thumbnails"),
+            wrap=lambda image: ctk.CTkImage(light_image=image, dark_image=image, size=image.size)
+        )
+        self._poll_thumbnails()
         
         # Current category filter
         self.current_category = "animals"
@@ -36,6 +70,14 @@ class MainWindow(ctk.CTk):
         # Build UI
         self._build_ui()
         self._refresh_list()
+        self._poll_outbox()
+        
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+    
+    def _on_close(self):
+        """Stop background workers and close the window."""
+        self.thumbnails.shutdown()
+        self.destroy()
     
     def _build_ui(self):
         """Build the main UI layout."""
@@ -68,9 +110,56 @@ class MainWindow(ctk.CTk):
             btn.pack(pady=5, padx=10, fill="x")
             self.category_buttons[cat['id']] = btn
         
+        # Dashboard panel
+        self.dashboard = ctk.CTkFrame(self.sidebar)
+        self.dashboard.pack(pady=(20, 0), padx=10, fill="x")
+        
+        ctk.CTkLabel(
+            self.dashboard,
+            text="Dashboard",
+            font=ctk.CTkFont(size=13, weight="bold")
+        ).pack(anchor="w", padx=10, pady=(8, 2))
+        
+        self.dashboard_label = ctk.CTkLabel(
+            self.dashboard,
+            text="",
+            font=ctk.CTkFont(size=11),
+            justify="left",
+            anchor="w"
+        )
+        self.dashboard_label.pack(anchor="w", padx=10, pady=(0, 8))
+        
         # Spacer
         ctk.CTkLabel(self.sidebar, text="").pack(expand=True)
         
+        # Undo/Redo buttons
+        history_frame = ctk.CTkFrame(self.sidebar, fg_color="transparent")
+        history_frame.pack(pady=(10, 0), padx=10, fill="x")
+        history_frame.grid_columnconfigure((0, 1), weight=1)
+        
+        self.undo_btn = ctk.CTkButton(
+            history_frame,
+            text="↶ Undo",
+            fg_color="transparent",
+            border_width=1,
+            command=self._undo
+        )
+        self.undo_btn.grid(row=0, column=0, sticky="ew", padx=(0, 5))
+        
+        self.redo_btn = ctk.CTkButton(
+            history_frame,
+            text="↷ Redo",
+            fg_color="transparent",
+            border_width=1,
+            command=self._redo
+        )
+        self.redo_btn.grid(row=0, column=1, sticky="ew", padx=(5, 0))
+        
+        # Inventory shortcuts - text fields keep their own Ctrl+Z
+        self.bind("<Control-z>", lambda e: self._history_shortcut(self._undo))
+        self.bind("<Control-y>", lambda e: self._history_shortcut(self._redo))
+        self.bind("<Control-Shift-Z>", lambda e: self._history_shortcut(self._redo))
+        
         # Publish button
         self.publish_btn = ctk.CTkButton(
             self.sidebar,
@@ -116,15 +205,55 @@ class MainWindow(ctk.CTk):
         )
         self.add_btn.grid(row=0, column=1, sticky="e")
         
-        # Search bar
+        # Search and filter bar
+        self.filter_bar = ctk.CTkFrame(self.content, fg_color="transparent")
+        self.filter_bar.grid(row=1, column=0, sticky="ew", pady=(10, 10))
+        self.filter_bar.grid_columnconfigure(0, weight=1)
+        
         self.search_var = ctk.StringVar()
         self.search_var.trace("w", lambda *args: self._refresh_list())
         self.search_entry = ctk.CTkEntry(
-            self.content,
+            self.filter_bar,
             placeholder_text="Search items...",
             textvariable=self.search_var
         )
-        self.search_entry.grid(row=1, column=0, sticky="ew", pady=(10, 10))
+        self.search_entry.grid(row=0, column=0, sticky="ew", padx=(0, 10))
+        
+        self.sort_var = ctk.StringVar(value="Default")
+        self.sort_menu = ctk.CTkOptionMenu(
+            self.filter_bar,
+            values=list(SORT_OPTIONS),
+            variable=self.sort_var,
+            width=160,
+            command=lambda _: self._refresh_list()
+        )
+        self.sort_menu.grid(row=0, column=1, padx=(0, 10))
+        
+        self.min_price_var = ctk.StringVar()
+        self.min_price_var.trace("w", lambda *args: self._refresh_list())
+        ctk.CTkEntry(
+            self.filter_bar,
+            placeholder_text="Min $",
+            width=70,
+            textvariable=self.min_price_var
+        ).grid(row=0, column=2, padx=(0, 5))
+        
+        self.max_price_var = ctk.StringVar()
+        self.max_price_var.trace("w", lambda *args: self._refresh_list())
+        ctk.CTkEntry(
+            self.filter_bar,
+            placeholder_text="Max $",
+            width=70,
+            textvariable=self.max_price_var
+        ).grid(row=0, column=3, padx=(0, 10))
+        
+        self.in_stock_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(
+            self.filter_bar,
+            text="In stock",
+            variable=self.in_stock_var,
+            command=self._refresh_list
+        ).grid(row=0, column=4)
         
         # Scrollable item list
         self.item_list = ctk.CTkScrollableFrame(self.content)
@@ -155,12 +284,31 @@ class MainWindow(ctk.CTk):
     
     def _refresh_list(self):
         """Refresh the item list."""
+        self._update_history_buttons()
+        self._update_dashboard()
+        
         # Clear existing items
         for widget in self.item_list.winfo_children():
             widget.destroy()
         
-        # Get filtered items
-        items = self.storage.get_by_category(self.current_category)
+        # Get filtered items (sorted indexes when sorting or range-filtering)
+        sort = SORT_OPTIONS.get(self.sort_var.get())
+        min_price = self._parse_price(self.min_price_var.get())
+        max_price = self._parse_price(self.max_price_var.get())
+        in_stock = self.in_stock_var.get()
+        
+        if sort or min_price is not None or max_price is not None or in_stock:
+            field, descending = sort or (None, False)
+            items = self.index.query(
+                self.current_category,
+                sort=field,
+                descending=descending,
+                min_price=min_price,
+                max_price=max_price,
+                in_stock=in_stock
+            )
+        else:
+            items = self.storage.get_by_category(self.current_category)
         
         # Apply search filter
         search_term = self.search_var.get().lower()
@@ -183,11 +331,54 @@ class MainWindow(ctk.CTk):
         for item in items:
             self._create_item_card(item)
     
+    @staticmethod
+    def _parse_price(text: str):
+        """Parse a price filter entry (blank or invalid means no bound)."""
+        try:
+            return float(text.strip().lstrip("$"))
+        except ValueError:
+            return None
+    
+    def _update_dashboard(self):
+        """Show running totals for the current category and the whole inventory."""
+        lines = []
+        for title, summary in [
+            ("This category", self.stats.summary(self.current_category)),
+            ("All items", self.stats.summary()),
+        ]:
+            by_status = summary["by_status"]
+            lines += [
+                title,
+                f"  Value: ${summary['inventory_value']:,.2f}",
+                f"  Units in stock: {summary['units_in_stock']}",
+                f"  Out of stock: {summary['out_of_stock']}",
+                f"  Reserved / Sold: {by_status['reserved']} / {by_status['sold']}",
+            ]
+        self.dashboard_label.configure(text="\n".join(lines))
+    
+    def _update_history_buttons(self):
+        """Enable/disable undo and redo to match the storage history."""
+        self.undo_btn.configure(state="normal" if self.storage.can_undo() else "disabled")
+        self.redo_btn.configure(state="normal" if self.storage.can_redo() else "disabled")
+    
     def _create_item_card(self, item: InventoryItem):
         """Create a card for an inventory item."""
         card = ctk.CTkFrame(self.item_list)
         card.pack(fill="x", pady=5, padx=5)
-        card.grid_columnconfigure(1, weight=1)
+        card.grid_columnconfigure(2, weight=1)
+        
+        # Thumbnail (placeholder until the decoder thread delivers it)
+        thumb_label = ctk.CTkLabel(card, text="🖼️", width=64, height=64)
+        thumb_label.grid(row=0, column=0, padx=(10, 0), pady=10)
+        
+        image_path = resolve_image_path(item.image)
+        if image_path:
+            thumbnail = self.thumbnails.get(
+                image_path,
+                lambda img, label=thumb_label: self._show_thumbnail(label, img)
+            )
+            if thumbnail is not None:
+                self._show_thumbnail(thumb_label, thumbnail)
         
         # Stock indicator
         stock_color = "#4CAF50" if item.quantity > 0 else "#F44336"
@@ -195,7 +386,7 @@ class MainWindow(ctk.CTk):
         
         # Info section
         info_frame = ctk.CTkFrame(card, fg_color="transparent")
-        info_frame.grid(row=0, column=0, sticky="w", padx=10, pady=10)
+        info_frame.grid(row=0, column=1, sticky="w", padx=10, pady=10)
         
         name_label = ctk.CTkLabel(
             info_frame,
@@ -222,7 +413,7 @@ class MainWindow(ctk.CTk):
         
         # Action buttons
         btn_frame = ctk.CTkFrame(card, fg_color="transparent")
-        btn_frame.grid(row=0, column=1, sticky="e", padx=10)
+        btn_frame.grid(row=0, column=2, sticky="e", padx=10)
         
         edit_btn = ctk.CTkButton(
             btn_frame,
@@ -242,6 +433,17 @@ class MainWindow(ctk.CTk):
         )
         delete_btn.pack(side="left", padx=5)
     
+    def _show_thumbnail(self, label: ctk.CTkLabel, image: ctk.CTkImage):
+        """Put a cached thumbnail on a card label (if the card still exists)."""
+        if not label.winfo_exists():
+            return
+        label.configure(image=image, text="")
+    
+    def _poll_thumbnails(self):
+        """Hand finished thumbnails to their cards, then reschedule."""
+        self.thumbnails.poll()
+        self.after(50, self._poll_thumbnails)
+    
     def _add_item(self):
         """Open dialog to add a new item."""
         dialog = ItemDialog(self, category=self.current_category)
@@ -269,13 +471,32 @@ class MainWindow(ctk.CTk):
             self._refresh_list()
             self.status_label.configure(text="Item deleted")
     
+    def _undo(self):
+        """Undo the last inventory change."""
+        if self.storage.undo():
+            self._refresh_list()
+            self.status_label.configure(text="Undone")
+    
+    def _redo(self):
+        """Redo the last undone inventory change."""
+        if self.storage.redo():
+            self._refresh_list()
+            self.status_label.configure(text="Redone")
+    
+    def _history_shortcut(self, action):
+        """Run undo/redo from a keyboard shortcut unless a text field has focus."""
+        if isinstance(self.focus_get(), (Entry, Text)):
+            return
+        action()
+    
     def _publish(self):
         """Publish inventory to GitHub."""
         if not self.publisher.is_configured():
             messagebox.showerror(
                 "Configuration Error",
-                "GitHub is not configured.\n\n"
-                "Please copy config.example.json to config.json and add your GitHub token."
+                "Publishing is not configured.\n\n"
+                "Please copy config.example.json to config.json and add your GitHub token "
+                "(or set git_clone_path when publish_backend is \"git\")."
             )
             return
         
@@ -283,16 +504,10 @@ class MainWindow(ctk.CTk):
         self.publish_btn.configure(state="disabled")
         self.update()
         
-        # Get inventory JSON
-        inventory_json = self.storage.get_json_string()
-        inventory_path = self.publisher.config.get("inventory_path", "docs/inventory.json")
-        
-        # Publish
-        success, message = self.publisher.publish_file(
-            inventory_path,
-            inventory_json,
-            "Update inventory from desktop app"
-        )
+        # Go through the outbox so a failed publish stays queued for retry
+        self.outbox.mark_pending()
+        success, message = self.outbox.flush()
+        self._shown_outbox_result = self.outbox.last_result
         
         self.publish_btn.configure(state="normal")
         
@@ -300,5 +515,39 @@ class MainWindow(ctk.CTk):
             self.status_label.configure(text="Published!")
             messagebox.showinfo("Success", "Inventory published to GitHub!\n\nWebsite will update in a few minutes.")
         else:
-            self.status_label.configure(text="Publish failed")
-            messagebox.showerror("Publish Error", message)
+            self.status_label.configure(text="Publish queued")
+            if self.auto_publish:
+                follow_up = "will be published automatically"
+            else:
+                follow_up = "will go out the next time you click Publish (auto-publish is off)"
+            messagebox.showerror(
+                "Publish Error",
+                f"{message}\n\nYour changes are saved in the outbox and {follow_up}."
+            )
+    
+    def _publish_files(self) -> dict:
+        """Build the files a publish uploads (repo path -> content)."""
+        inventory_path = self.publisher.config.get("inventory_path", "docs/inventory.json")
+        files = {inventory_path: self.storage.get_json_string()}
+        
+        # Dashboard numbers, if a stats path is configured
+        stats_path = self.publisher.config.get("stats_path")
+        if stats_path:
+            files[stats_path] = self.stats.to_json()
+        
+        # Only the search shards that changed since the last publish
+        files.update(self.search_index.pending_files())
+        return files
+    
+    def _poll_outbox(self):
+        """Start due auto-publishes and report their results, then reschedule."""
+        if self.auto_publish:
+            self.outbox.poll()
+        
+        result = self.outbox.last_result
+        if result is not None and result is not self._shown_outbox_result:
+            self._shown_outbox_result = result
+            success, message = result
+            self.status_label.configure(text="Auto-published" if success else "Publish pending (will retry)")
+        
+        self.after(1000, self._poll_outbox)
@@ -0,0 +1,247 @@
+"""
+Thumbnail Cache - Background-Decoded Item Previews
+"""
+import hashlib
+import os
+import queue
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOCS_DIR = os.path.join(os.path.dirname(APP_DIR), "docs")
+
+DEFAULT_SIZE = (64, 64)
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024  # decoded pixels kept in memory
+DEFAULT_MAX_DISK_BYTES = 64 * 1024 * 1024  # PNGs kept in the disk cache
+
+# (absolute path, mtime_ns, file size) - changes whenever the file does
+CacheKey = Tuple[str, int, int]
+
+
+def resolve_image_path(image: str) -> Optional[str]:
+    """
+    Find the local file for an item's image path (e.g. "Assets/photo.jpg").
+    
+    Checks the app's local assets folder first (where ItemDialog copies
+    new images), then the website's docs folder.
+    """
+    if not image:
+        return None
+    candidates = [
+        os.path.join(APP_DIR, "assets", os.path.basename(image)),
+        os.path.join(DOCS_DIR, image),
+    ]
+    for path in candidates:
+        if os.path.isfile(path):
+            return path
+    return None
+
+
+class ThumbnailCache:
+    """
+    LRU cache of downscaled images, bounded by decoded size in bytes.
+    
+    Decoding happens on worker threads; finished thumbnails are handed back
+    through a queue that the Tk thread drains with poll(), so callbacks
+    always run on the UI thread. Each thumbnail is passed through `wrap`
+    once (e.g. to build a CTkImage) and the wrapped object is what get()
+    and callbacks receive, so redrawing a card reuses it.
+    
+    The disk cache is pruned back to max_disk_bytes (least recently used
+    first) on a worker thread at startup, since edited and deleted images
+    leave their old thumbnails behind.
+    """
+    
+    def __init__(
+        self,
+        size: Tuple[int, int] = DEFAULT_SIZE,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        disk_dir: Optional[str] = None,
+        max_disk_bytes: int = DEFAULT_MAX_DISK_BYTES,
+        workers: int = 2,
+        wrap: Callable[[Image.Image], Any] = lambda image: image
+    ):
+        """
+        Args:
+            size: Bounding box for thumbnails (aspect ratio is kept)
+            max_bytes: Memory budget for decoded thumbnails
+            disk_dir: Optional folder to persist thumbnails between runs
+            max_disk_bytes: Size the disk cache is pruned back to
+            workers: Decoder threads
+            wrap: Converts a decoded thumbnail for display (runs on the Tk thread)
+        """
+        self.size = size
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.wrap = wrap
+        
+        # key -> (decoded image, wrapped image)
+        self._cache: "OrderedDict[CacheKey, Tuple[Image.Image, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._waiting: Dict[CacheKey, List[Callable[[Any], None]]] = {}
+        self._done: "queue.Queue[Tuple[CacheKey, Optional[Image.Image]]]" = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="thumbnails")
+        
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+            self._executor.submit(self.prune_disk)
+    
+    def get(self, path: str, callback: Callable[[Any], None]) -> Optional[Any]:
+        """
+        Get a thumbnail, decoding it in the background on a miss.
+        
+        Args:
+            path: Local image file
+            callback: Called with the wrapped thumbnail from poll() once decoded
+        
+        Returns:
+            The wrapped thumbnail if it is already in memory, otherwise None
+        """
+        key = self._key(path)
+        if key is None:
+            return None
+        
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+            return entry[1]
+        
+        if key in self._waiting:
+            # Already being decoded - just add another listener
+            self._waiting[key].append(callback)
+        else:
+            self._waiting[key] = [callback]
+            self._executor.submit(self._decode, key)
+        return None
+    
+    def poll(self) -> None:
+        """Deliver finished thumbnails (call periodically from the Tk thread)."""
+        while True:
+            try:
+                key, image = self._done.get_nowait()
+            except queue.Empty:
+                return
+            
+            callbacks = self._waiting.pop(key, [])
+            if image is None:
+                continue
+            wrapped = self._store(key, image)
+            for callback in callbacks:
+                callback(wrapped)
+    
+    def shutdown(self) -> None:
+        """Stop the decoder threads."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def prune_disk(self) -> None:
+        """Delete the least recently used disk thumbnails until the cache fits max_disk_bytes."""
+        if not self.disk_dir:
+            return
+        try:
+            entries = []
+            with os.scandir(self.disk_dir) as it:
+                for entry in it:
+                    if entry.is_file():
+                        stat = entry.stat()
+                        entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        except OSError as e:
+            print(f"Error reading thumbnail cache: {e}")
+            return
+        
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error pruning thumbnail {path}: {e}")
+                continue
+            total -= size
+    
+    def _key(self, path: str) -> Optional[CacheKey]:
+        """Build the cache key for a file (None if it can't be read)."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    
+    def _store(self, key: CacheKey, image: Image.Image) -> Any:
+        """Insert into the LRU, evict the oldest entries over budget, return the wrapped image."""
+        wrapped = self.wrap(image)
+        self._cache[key] = (image, wrapped)
+        self._bytes += self._image_bytes(image)
+        while self._bytes > self.max_bytes and len(self._cache) > 1:
+            _, (evicted, _) = self._cache.popitem(last=False)
+            self._bytes -= self._image_bytes(evicted)
+        return wrapped
+    
+    def _decode(self, key: CacheKey) -> None:
+        """Worker thread: load a thumbnail from disk cache or the source image."""
+        image = None
+        try:
+            cached_path = self._disk_path(key)
+            if cached_path:
+                image = self._load_cached(cached_path)
+            if image is None:
+                with Image.open(key[0]) as img:
+                    # Let JPEG decode at reduced scale - much cheaper than full size
+                    img.draft("RGB", (self.size[0] * 2, self.size[1] * 2))
+                    image = img.convert("RGBA" if img.mode in ("RGBA", "LA", "P") else "RGB")
+                    image.thumbnail(self.size)
+                if cached_path:
+                    self._save_cached(image, cached_path)
+        except Exception as e:
+            # Not just OSError - PIL raises DecompressionBombError/ValueError
+            # too, and the result must always be posted or the key stays waiting
+            image = None
+            print(f"Error loading thumbnail for {key[0]}: {e}")
+        finally:
+            self._done.put((key, image))
+    
+    def _load_cached(self, cached_path: str) -> Optional[Image.Image]:
+        """Read a disk-cached thumbnail (None if missing or unreadable), marking it recently used."""
+        if not os.path.exists(cached_path):
+            return None
+        try:
+            with Image.open(cached_path) as img:
+                image = img.copy()
+            os.utime(cached_path)
+            return image
+        except Exception as e:
+            print(f"Error reading cached thumbnail {cached_path}: {e}")
+            return None
+    
+    def _save_cached(self, image: Image.Image, cached_path: str) -> None:
+        """Write a thumbnail to the disk cache; a failure only costs the cache entry."""
+        tmp_path = cached_path + ".tmp"
+        try:
+            image.save(tmp_path, "PNG")
+            os.replace(tmp_path, cached_path)
+        except Exception as e:
+            print(f"Error caching thumbnail {cached_path}: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    
+    def _disk_path(self, key: CacheKey) -> Optional[str]:
+        """Disk cache file for a key (None when disk caching is off)."""
+        if not self.disk_dir:
+            return None
+        path, mtime_ns, size = key
+        digest = hashlib.sha1(f"{path}|{mtime_ns}|{size}|{self.size}".encode("utf-8")).hexdigest()
+        return os.path.join(self.disk_dir, f"{digest}.png")
+    
+    @staticmethod
+    def _image_bytes(image: Image.Image) -> int:
+        """Approximate decoded size of an image."""
+        return image.width * image.height * len(image.getbands())